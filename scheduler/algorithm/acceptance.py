@@ -0,0 +1,125 @@
+import random
+from bisect import bisect_left
+from math import exp
+
+# Decisions on a candidate schedule
+REJECT = 0
+ACCEPT = 1
+RESTORE = 2    # Reject it and continue from the best schedule
+
+
+class AgeAcceptance:
+    """Accepts worse schedules only once the line has not improved for `max_age` steps.
+
+    The chance of accepting then falls with the candidate's rank among the
+    last `history_size` best fitnesses, and a rejected candidate sends the
+    search back to the best schedule.
+    """
+
+    def __init__(self, max_age=100, history_size=1000):
+        self.max_age = max_age
+        self.history_size = history_size
+        self.history = []    # Recent best fitnesses, ascending as each new best beats the last
+        self.age = 0
+
+    def reset(self, fitness):
+        self.history = [fitness]
+        self.age = 0
+
+    def decide(self, current, candidate, best):
+        if current > candidate:
+            if self.max_age is None:
+                return REJECT
+            self.age += 1
+            if self.max_age > self.age:
+                return REJECT
+            self.age = 0
+            proportion_similar = bisect_left(self.history, candidate) / len(self.history)
+            return ACCEPT if random.random() < exp(-proportion_similar) else RESTORE
+        if not candidate > current:
+            self.age += 1
+            return ACCEPT
+        self.age = 0
+        if candidate > best:
+            self.history.append(candidate)
+            if len(self.history) > self.history_size:
+                del self.history[0]
+        return ACCEPT
+
+
+class SimulatedAnnealing:
+    """Accepts a worse schedule with probability exp(-delta / temperature).
+
+    The temperature cools geometrically every step and is reheated to its
+    initial value after `reheat_after` steps without a new best schedule.
+    """
+
+    def __init__(self, initial_temperature=10, cooling=0.9999, min_temperature=0.01, reheat_after=10000):
+        self.initial_temperature = initial_temperature
+        self.cooling = cooling
+        self.min_temperature = min_temperature
+        self.reheat_after = reheat_after
+        self.temperature = initial_temperature
+        self.stagnation = 0
+
+    def reset(self, fitness):
+        self.temperature = self.initial_temperature
+        self.stagnation = 0
+
+    def decide(self, current, candidate, best):
+        self.stagnation += 1
+        if candidate > best:
+            self.stagnation = 0
+        elif self.stagnation >= self.reheat_after:
+            self.temperature = self.initial_temperature
+            self.stagnation = 0
+        else:
+            self.temperature = max(self.temperature * self.cooling, self.min_temperature)
+
+        delta = candidate.energy - current.energy
+        if delta <= 0 or random.random() < exp(-delta / self.temperature):
+            return ACCEPT
+        return REJECT
+
+
+class LateAcceptance:
+    """Late Acceptance Hill Climbing: accepts a schedule no worse than the current one
+    `length` steps ago, kept in a fixed ring buffer"""
+
+    def __init__(self, length=200):
+        self.length = length
+        self.history = []
+        self.step = 0
+
+    def reset(self, fitness):
+        self.history = [fitness.energy] * self.length
+        self.step = 0
+
+    def decide(self, current, candidate, best):
+        position = self.step % self.length
+        self.step += 1
+        energy = candidate.energy
+        if energy <= self.history[position] or energy <= current.energy:
+            self.history[position] = energy
+            return ACCEPT
+        self.history[position] = current.energy
+        return REJECT
+
+
+class GreatDeluge:
+    """Accepts any schedule below a water level that sinks towards the best energy by
+    `rain` of the remaining distance every step"""
+
+    def __init__(self, rain=0.001):
+        self.rain = rain
+        self.level = 0
+
+    def reset(self, fitness):
+        self.level = fitness.energy
+
+    def decide(self, current, candidate, best):
+        self.level -= self.rain * (self.level - best.energy)
+        energy = candidate.energy
+        if energy <= self.level or energy <= current.energy:
+            return ACCEPT
+        return REJECT
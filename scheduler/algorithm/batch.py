@@ -0,0 +1,86 @@
+import numpy as np
+
+from .fitness import Fitness, LUNCH_TIME_SLOTS, LUNCH_DAY_SCORE
+
+
+class BatchFitnessEvaluator:
+    """Vectorised get_fitness for many candidate SlotArrays of the same sections.
+
+    Every section is expanded once into one row per hour it occupies, so a
+    batch of K candidates becomes (K, hours) arrays of (day, time, resource)
+    keys. Conflicts are counted with a single `bincount` per resource type and
+    the preference and lunch terms come from precomputed lookup tables.
+    """
+
+    def __init__(self, sections, max_days, slots_per_day, faculty_list, room_count, group_count, lunch_time_slots=LUNCH_TIME_SLOTS):
+        self.max_days = max_days
+        self.slots_per_day = slots_per_day
+        self.cells = max_days * slots_per_day
+        self.room_count = room_count
+        self.faculty_count = len(faculty_list)
+        self.group_count = group_count
+        self.zero_overlap_score = group_count * max_days * LUNCH_DAY_SCORE
+
+        durations = np.array([section.duration for section in sections], dtype=np.int64)
+        self.hour_section = np.repeat(np.arange(len(sections)), durations)
+        self.hour_offset = np.concatenate([np.arange(duration) for duration in durations]) if len(sections) else np.zeros(0, dtype=np.int64)
+        self.hour_faculty = np.array([section.faculty.index for section in sections], dtype=np.int64)[self.hour_section]
+        self.hour_group = np.array([section.group.index for section in sections], dtype=np.int64)[self.hour_section]
+
+        # Priority earned by a faculty teaching in a (day, time) cell
+        self.preference = np.zeros((self.faculty_count, self.cells), dtype=np.int64)
+        for faculty in faculty_list:
+            preferred = np.array([list(faculty.preferred[day][1:]) for day in range(1, max_days + 1)], dtype=np.int64)
+            self.preference[faculty.index] = preferred.ravel() * faculty.priority
+
+        max_time = slots_per_day + int(durations.max(initial=1))
+        self.is_lunch = np.zeros(max_time + 1, dtype=bool)
+        for time in lunch_time_slots:
+            if time <= max_time:
+                self.is_lunch[time] = True
+
+        self.max_score = sum(faculty.max_score for faculty in faculty_list)
+
+    def evaluate(self, candidates):
+        """Return the Fitness of every SlotArray in `candidates`, in order"""
+        days = np.stack([np.frombuffer(slots.days, dtype=np.int16) for slots in candidates]).astype(np.int64)
+        times = np.stack([np.frombuffer(slots.times, dtype=np.int16) for slots in candidates]).astype(np.int64)
+        rooms = np.stack([np.frombuffer(slots.rooms, dtype=np.int16) for slots in candidates]).astype(np.int64)
+        return self.evaluate_arrays(days, times, rooms)
+
+    def evaluate_arrays(self, days, times, rooms):
+        """Score (K, sections) arrays of days, start times and room indices"""
+        batch_size = days.shape[0]
+        day = days[:, self.hour_section]
+        time = times[:, self.hour_section] + self.hour_offset
+        room = rooms[:, self.hour_section]
+        cell = (day - 1) * self.slots_per_day + time - 1
+        candidate = np.arange(batch_size)[:, None]
+
+        room_conflict = self._conflicts((candidate * self.cells + cell) * self.room_count + room, self.room_count)
+        faculty_conflict = self._conflicts((candidate * self.cells + cell) * self.faculty_count + self.hour_faculty, self.faculty_count)
+        group_conflict = self._conflicts((candidate * self.cells + cell) * self.group_count + self.hour_group, self.group_count)
+
+        preference_score = self.preference[self.hour_faculty, cell].sum(axis=1)
+
+        lunch = self.is_lunch[time]
+        lunch_key = ((candidate * self.group_count + self.hour_group) * self.max_days + day - 1)[lunch]
+        lunch_usage = np.bincount(lunch_key, minlength=batch_size * self.group_count * self.max_days)
+        lunch_overlap = (lunch_usage.reshape(batch_size, -1) ** 3).sum(axis=1)
+
+        return [
+            Fitness(
+                int(room_conflict[k]),
+                int(faculty_conflict[k]),
+                int(group_conflict[k]),
+                int(preference_score[k]) / max(self.max_score, 1),
+                (self.zero_overlap_score - int(lunch_overlap[k])) / max(self.zero_overlap_score, 1)
+            )
+            for k in range(batch_size)
+        ]
+
+    def _conflicts(self, keys, resource_count):
+        """Occupied hours minus distinct (day, time, resource) keys, per candidate"""
+        batch_size = keys.shape[0]
+        usage = np.bincount(keys.ravel(), minlength=batch_size * self.cells * resource_count)
+        return keys.shape[1] - np.count_nonzero(usage.reshape(batch_size, -1), axis=1)
@@ -0,0 +1,244 @@
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import product
+
+from .fitness import Fitness, LUNCH_TIME_SLOTS, LUNCH_DAY_SCORE
+
+# Margin below the bound, so a schedule reaching it is not missed to rounding
+TOLERANCE = 1e-9
+# Most steps of packing sections exactly over the whole timetable, beyond which the sections' windows are summed instead
+MAX_PACKING_WORK = 200000
+
+
+def _windows(weights, duration):
+    return [sum(weights[start:start + duration]) for start in range(1, len(weights) - duration + 1)]
+
+
+def _least_window(counts, duration):
+    """Fewest marked hours a section of the duration can cover on a day, given the marks of each hour"""
+    return min(_windows(counts, duration), default=0)
+
+
+def _best_windows(days, durations):
+    """Most weight the sections can cover when they may overlap: each at its best window of the week"""
+    return sum(max(max(_windows(weights, duration), default=0) for weights in days) for duration in durations)
+
+
+def _subsets(durations, slots_per_day):
+    """Section lengths, how many sections there are of each, and the multisets of them that fit in one day"""
+    lengths = sorted(set(durations))
+    counts = Counter(durations)
+    total = tuple(counts[length] for length in lengths)
+    subsets = [
+        subset for subset in product(*(range(count + 1) for count in total))
+        if sum(length * count for length, count in zip(lengths, subset)) <= slots_per_day
+    ]
+    return lengths, total, subsets
+
+
+def _packing_work(durations, days_per_week, slots_per_day, limit):
+    """Most steps _best_packing takes on the sections, or None if that is over the limit"""
+    states = days_per_week
+    for count in Counter(durations).values():
+        states *= count + 1
+    if states > limit:
+        return None
+    work = states * len(_subsets(durations, slots_per_day)[2])
+    return work if work <= limit else None
+
+
+def _best_packing(weightings, durations):
+    """Most weight a faculty's sections can cover without overlapping each other, under each of the weightings.
+
+    Each weighting holds the weight of every hour of every day, index 0 unused.
+    Sections of equal length are interchangeable, so the search runs over how
+    many of each length are left: per day over the hours, and across days over
+    which of them go on each one. Every weighting is maximised in the same
+    search. Returns None when the sections cannot all be placed apart.
+    """
+    slots_per_day = len(weightings[0][0]) - 1
+    lengths, total, subsets = _subsets(durations, slots_per_day)
+
+    def day_best(weights):
+        @lru_cache(maxsize=None)
+        def best(time, remaining):
+            if not any(remaining):
+                return (0,) * len(weights)
+            if time > slots_per_day:
+                return None
+            options = [best(time + 1, remaining)]
+            for position, length in enumerate(lengths):
+                if remaining[position] and time + length - 1 <= slots_per_day:
+                    rest = best(time + length, remaining[:position] + (remaining[position] - 1,) + remaining[position + 1:])
+                    if rest is not None:
+                        options.append(tuple(sum(hours[time:time + length]) + value for hours, value in zip(weights, rest)))
+            options = [option for option in options if option is not None]
+            return tuple(map(max, zip(*options))) if options else None
+        return best
+
+    # Days weighted alike, such as those without preferred hours, share a search
+    searches = {}
+    day_searches = []
+    for day in range(len(weightings[0])):
+        weights = tuple(tuple(days[day]) for days in weightings)
+        day_searches.append(searches.setdefault(weights, day_best(weights)))
+
+    @lru_cache(maxsize=None)
+    def week_best(day, remaining):
+        if day == len(day_searches):
+            return (0,) * len(weightings) if not any(remaining) else None
+        result = None
+        for subset in subsets:
+            if any(count > left for count, left in zip(subset, remaining)):
+                continue
+            here = day_searches[day](1, subset)
+            if here is None:
+                continue
+            rest = week_best(day + 1, tuple(left - count for left, count in zip(remaining, subset)))
+            if rest is not None:
+                value = tuple(a + b for a, b in zip(here, rest))
+                result = value if result is None else tuple(map(max, result, value))
+        return result
+
+    packed = week_best(0, total)
+    return list(packed) if packed is not None else None
+
+
+def _pack_faculties(sections, faculty_list, days_per_week, slots_per_day, fnWeightings, max_work):
+    """Best packing of each faculty's sections under each weighting fnWeightings gives its hours, by faculty index.
+
+    Faculties are packed exactly from the cheapest while max_work steps last,
+    and the rest, or those whose sections cannot all be placed apart, get their
+    sections' best windows.
+    """
+    by_faculty = defaultdict(list)
+    for section in sections:
+        by_faculty[section.faculty.index].append(section.duration)
+
+    plans = []
+    for faculty in faculty_list:
+        durations = by_faculty[faculty.index]
+        if durations:
+            work = _packing_work(durations, days_per_week, slots_per_day, max_work)
+            plans.append((work if work is not None else float('inf'), faculty.index, fnWeightings(faculty), durations))
+
+    packings = {}
+    budget = max_work
+    for work, index, weightings, durations in sorted(plans, key=lambda plan: plan[0]):
+        packed = None
+        if work <= budget:
+            budget -= work
+            packed = _best_packing(weightings, durations)
+        packings[index] = packed if packed is not None else [_best_windows(days, durations) for days in weightings]
+    return packings
+
+
+def _preference_days(faculty, days_per_week, slots_per_day):
+    return [list(faculty.preferred[day][:slots_per_day + 1]) for day in range(1, days_per_week + 1)]
+
+
+def _constraint_days(faculty, days_per_week, slots_per_day, max_score, zero_overlap_score, lunch):
+    """Score of every hour of the faculty's week, with its preferred hours at lunch charged the lunch overlap"""
+    return [
+        [80 * faculty.priority * preferred / max_score - 20 * at_lunch / zero_overlap_score
+         for preferred, at_lunch in zip(faculty.preferred[day][:slots_per_day + 1], lunch)]
+        for day in range(1, days_per_week + 1)
+    ]
+
+
+def _preference_score(faculty, days, packed):
+    # A faculty without a positive priority earns nothing from its preferred hours at best
+    return max(0, faculty.priority) * min(sum(map(sum, days)), packed)
+
+
+def get_preference_bound(sections, faculty_list, days_per_week, slots_per_day, max_work=MAX_PACKING_WORK):
+    """Most preference score any conflict-free schedule can earn: each faculty's sections packed, apart from
+    everyone else's, to cover as many of its preferred hours as they can"""
+    packings = _pack_faculties(
+        sections, faculty_list, days_per_week, slots_per_day,
+        lambda faculty: [_preference_days(faculty, days_per_week, slots_per_day)], max_work
+    )
+    return sum(
+        _preference_score(faculty, _preference_days(faculty, days_per_week, slots_per_day), packings[faculty.index][0])
+        for faculty in faculty_list if faculty.index in packings
+    )
+
+
+def get_lunch_overlap_bound(sections, days_per_week, slots_per_day, lunch_time_slots=LUNCH_TIME_SLOTS):
+    """Least lunch overlap any schedule has.
+
+    A group sits through lunch for its hours beyond the other cells of the week
+    and for the lunch hours no start of a section can avoid, and the overlap,
+    cubed per day, is least when these hours are spread evenly over the days.
+    """
+    lunch = _lunch_hours(slots_per_day, lunch_time_slots)
+    free_cells = days_per_week * (slots_per_day - sum(lunch))
+
+    hours = defaultdict(int)
+    unavoidable = defaultdict(int)
+    for section in sections:
+        hours[section.group.index] += section.duration
+        unavoidable[section.group.index] += _least_window(lunch, section.duration)
+
+    overlap = 0
+    for group, group_hours in hours.items():
+        forced = max(unavoidable[group], group_hours - free_cells)
+        share, extra = divmod(forced, days_per_week)
+        overlap += extra * (share + 1) ** 3 + (days_per_week - extra) * share ** 3
+    return overlap
+
+
+def get_constraint_score_bound(sections, faculty_list, days_per_week, slots_per_day, group_count, lunch_time_slots=LUNCH_TIME_SLOTS,
+                               max_work=MAX_PACKING_WORK):
+    """Most constraint score of a conflict-free schedule when preferred hours at lunch are charged.
+
+    The lunch overlap of a group day is at least its lunch hours, so charging every
+    lunch hour of a section once and packing each faculty's sections for the best
+    balance of preference against lunch bounds the score.
+    """
+    max_score = max(sum(faculty.max_score for faculty in faculty_list), 1)
+    zero_overlap_score = max(group_count * days_per_week * LUNCH_DAY_SCORE, 1)
+    lunch = _lunch_hours(slots_per_day, lunch_time_slots)
+    packings = _pack_faculties(
+        sections, faculty_list, days_per_week, slots_per_day,
+        lambda faculty: [_constraint_days(faculty, days_per_week, slots_per_day, max_score, zero_overlap_score, lunch)], max_work
+    )
+    return 20 + sum(packed for packed, in packings.values())
+
+
+def get_optimal_fitness(sections, faculty_list, days_per_week, slots_per_day, group_count, lunch_time_slots=LUNCH_TIME_SLOTS,
+                        max_work=MAX_PACKING_WORK):
+    """Conflict-free Fitness whose constraint score no schedule of the timetable can beat, so a search can
+    stop once it reaches it: the separate bounds on preference and lunch overlap, lowered to the joint bound
+    on their score where that is tighter. Each faculty's sections are packed once for both."""
+    max_score = sum(faculty.max_score for faculty in faculty_list)
+    zero_overlap_score = group_count * days_per_week * LUNCH_DAY_SCORE
+    lunch_hours = _lunch_hours(slots_per_day, lunch_time_slots)
+    packings = _pack_faculties(
+        sections, faculty_list, days_per_week, slots_per_day,
+        lambda faculty: [
+            _preference_days(faculty, days_per_week, slots_per_day),
+            _constraint_days(faculty, days_per_week, slots_per_day, max(max_score, 1), max(zero_overlap_score, 1), lunch_hours)
+        ],
+        max_work
+    )
+    preference_score = 0
+    joint = 20
+    for faculty in faculty_list:
+        if faculty.index in packings:
+            packed_preference, packed_score = packings[faculty.index]
+            preference_score += _preference_score(faculty, _preference_days(faculty, days_per_week, slots_per_day), packed_preference)
+            joint += packed_score
+
+    preference = preference_score / max(max_score, 1)
+    lunch = (zero_overlap_score - get_lunch_overlap_bound(sections, days_per_week, slots_per_day, lunch_time_slots)) / max(zero_overlap_score, 1)
+    lunch = min(lunch, (joint - 80 * preference) / 20)
+    return Fitness(0, 0, 0, preference, lunch - TOLERANCE)
+
+
+def _lunch_hours(slots_per_day, lunch_time_slots):
+    lunch = [0] * (slots_per_day + 1)
+    for time in lunch_time_slots:
+        if 1 <= time <= slots_per_day:
+            lunch[time] = 1
+    return lunch
@@ -0,0 +1,71 @@
+import random
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ZobristTable:
+    """Random 64-bit keys whose XOR over all placements hashes a schedule.
+
+    A placement's key is the XOR of independent keys for its section's day,
+    time and room, so applying a move updates the hash with a few XORs per
+    moved section instead of rehashing the whole schedule.
+    """
+
+    def __init__(self, section_count, days_per_week, slots_per_day, room_count):
+        self.days = [[random.getrandbits(64) for _ in range(days_per_week + 1)] for _ in range(section_count)]
+        self.times = [[random.getrandbits(64) for _ in range(slots_per_day + 1)] for _ in range(section_count)]
+        self.rooms = [[random.getrandbits(64) for _ in range(room_count)] for _ in range(section_count)]
+        self.sections = np.arange(section_count)
+        self.day_keys = np.array(self.days, dtype=np.uint64).reshape(section_count, days_per_week + 1)
+        self.time_keys = np.array(self.times, dtype=np.uint64).reshape(section_count, slots_per_day + 1)
+        self.room_keys = np.array(self.rooms, dtype=np.uint64).reshape(section_count, room_count)
+
+    def key(self, index, placement):
+        day, time, room = placement
+        return self.days[index][day] ^ self.times[index][time] ^ self.rooms[index][room]
+
+    def hash(self, slots):
+        keys = (
+            self.day_keys[self.sections, np.frombuffer(slots.days, dtype=np.int16)]
+            ^ self.time_keys[self.sections, np.frombuffer(slots.times, dtype=np.int16)]
+            ^ self.room_keys[self.sections, np.frombuffer(slots.rooms, dtype=np.int16)]
+        )
+        return int(np.bitwise_xor.reduce(keys, initial=np.uint64(0)))
+
+    def update(self, value, move):
+        """Hash of a schedule after applying a Move or CompoundMove to it"""
+        for part in move:
+            value ^= self.key(part.index, part.old) ^ self.key(part.index, part.new)
+        return value
+
+
+class FitnessCache:
+    """Bounded LRU map from schedule hashes to their Fitness, counting hits and misses"""
+
+    def __init__(self, zobrist, capacity=100000):
+        self.zobrist = zobrist
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        fitness = self.entries.get(key)
+        if fitness is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return fitness
+
+    def put(self, key, fitness):
+        self.entries[key] = fitness
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
@@ -1,4 +1,5 @@
 class Course:
+    __slots__ = ('course_id', 'rooms')
 
     def __init__(self, course_id, rooms):
         self.course_id = course_id
@@ -1,4 +1,5 @@
 class DateTimeSlot:
+    __slots__ = ('day', 'time')
 
     def __init__(self, day, time):
         self.day = day 
@@ -10,7 +11,8 @@ class DateTimeSlot:
                 and self.time == other.time)
 
     def __hash__(self):
-        return hash(self.day) ^ hash(self.time)
+        # Perfect index: time is a PositiveSmallIntegerField, so it never reaches 1 << 16
+        return (self.day << 16) | self.time
 
     def __str__(self):
         return f"Day: {self.day} Time: {self.time}"
\ No newline at end of file
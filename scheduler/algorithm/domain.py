@@ -0,0 +1,23 @@
+class Domain:
+    """Placements a section may take, built once at load time so moves are sampled in O(1)"""
+    __slots__ = ('_starts', 'start_set', 'preferred_starts', 'rooms')
+
+    def __init__(self, starts, preferred_starts, rooms):
+        self.starts = starts    # (day, time) starts that keep the whole section within the day
+        self.preferred_starts = preferred_starts    # Starts covering one of the faculty's slot choices
+        self.rooms = rooms    # Room indices of the course's rooms that can seat the group
+
+    @property
+    def starts(self):
+        return self._starts
+
+    @starts.setter
+    def starts(self, starts):
+        self._starts = starts
+        self.start_set = frozenset(starts)    # The same starts, for membership tests
+
+    def allows(self, start):
+        return start in self.start_set
+
+    def __str__(self):
+        return f"{len(self.starts)} starts ({len(self.preferred_starts)} preferred), {len(self.rooms)} rooms"
@@ -0,0 +1,307 @@
+import random
+
+from .fitness import Fitness, LUNCH_TIME_SLOTS, LUNCH_DAY_SCORE
+from .move import CompoundMove, Move
+
+
+class IndexSet:
+    """Set of slot indices with O(1) add, discard and random choice"""
+
+    def __init__(self):
+        self.items = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if last != item:
+            self.items[position] = last
+            self.positions[last] = position
+
+    def choice(self):
+        return random.choice(self.items)
+
+
+class FitnessEvaluator:
+    """Incremental version of get_fitness for a single schedule.
+
+    Keeps the room/faculty/group occupancy counters and the preference and
+    lunch partial sums of the slots it tracks, so applying or rolling back a
+    Move costs O(section.duration) instead of a full re-evaluation.
+
+    It also tracks which slots take part in a clash (`conflicted`) and which
+    have hours outside their faculty's preferences (`unpreferred`), so
+    mutations can be aimed at them. Slots in `fixed` never move and are left
+    out of both.
+
+    With a FitnessCache it keeps the Zobrist hash of the schedule up to date,
+    and scoring a move that leads to a cached schedule skips the evaluation.
+
+    In hard-only mode it counts conflicts alone and reports no constraint
+    score, which is all a search needs while conflicts remain.
+    """
+
+    def __init__(self, slots, max_days, slots_per_day, faculty_list, group_count, lunch_time_slots=LUNCH_TIME_SLOTS, cache=None, hard_only=False, fixed=frozenset()):
+        self.max_days = max_days
+        self.slots_per_day = slots_per_day
+        self.faculty_list = faculty_list
+        self.group_count = group_count
+        self.lunch_time_slots = set(lunch_time_slots)
+        self.zero_overlap_score = group_count * max_days * LUNCH_DAY_SCORE
+        self.cache = cache
+        self.hash = 0
+        self.hard_only = hard_only
+        self.fixed = fixed
+        self.reset(slots)
+
+    def reset(self, slots):
+        """Rebuild all counters from a full SlotArray"""
+        self.slots = slots
+        self.room_count = len(slots.room_list)
+
+        # Occupancy counters indexed by (day, time) cell and dense resource index.
+        # The owner sums add up the slot indices occupying a key, which identifies
+        # the other slot whenever a key goes from one to two occupants or back.
+        cells = self.max_days * self.slots_per_day
+        self.room_usage = [0] * (cells * self.room_count)
+        self.faculty_usage = [0] * (cells * len(self.faculty_list))
+        self.group_usage = [0] * (cells * self.group_count)
+        self.room_owners = [0] * len(self.room_usage)
+        self.faculty_owners = [0] * len(self.faculty_usage)
+        self.group_owners = [0] * len(self.group_usage)
+        self.lunch_usage = [0] * (self.group_count * self.max_days)
+        self.room_conflict = self.faculty_conflict = self.group_conflict = 0
+        self.preference_score = 0
+        self.lunch_overlap = 0
+
+        # Number of clashing (hour, resource) keys of every slot
+        self.clashes = [0] * len(slots)
+        self.conflicted = IndexSet()
+        self.unpreferred = IndexSet()
+
+        self.max_score = sum(faculty.max_score for faculty in self.faculty_list)
+
+        for index, section in enumerate(slots.sections):
+            self._update(index, section, *slots[index], 1)
+        if self.cache is not None:
+            self.hash = self.cache.zobrist.hash(slots)
+
+    def set_hard_only(self, hard_only):
+        """Count conflicts alone from now on, or score everything again"""
+        if hard_only != self.hard_only:
+            self.hard_only = hard_only
+            self.reset(self.slots)
+
+    @property
+    def fitness(self):
+        if self.hard_only:
+            return Fitness(self.room_conflict, self.faculty_conflict, self.group_conflict, 0, 0)
+        return Fitness(
+            self.room_conflict,
+            self.faculty_conflict,
+            self.group_conflict,
+            self.preference_score / max(self.max_score, 1),
+            (self.zero_overlap_score - self.lunch_overlap) / max(self.zero_overlap_score, 1)
+        )
+
+    def pick(self, focus):
+        """Movable slot to change next, favouring conflicting then badly placed ones, or None for a random one"""
+        if focus and random.random() < focus:
+            for targets in (self.conflicted, self.unpreferred):
+                if targets:
+                    return targets.choice()
+        return None
+
+    def apply(self, move):
+        """Apply a Move or CompoundMove to the tracked slots, updating the counters in O(section.duration) per section"""
+        for part in move:
+            section = self.slots.sections[part.index]
+            self._update(part.index, section, *self.slots[part.index], -1)
+            self.slots[part.index] = part.new
+            self._update(part.index, section, *part.new, 1)
+        if self.cache is not None:
+            self.hash = self.cache.zobrist.update(self.hash, move)
+
+    def lift(self, index):
+        """Take a section out of the counters, leaving a partial schedule until it is placed again"""
+        self._update(index, self.slots.sections[index], *self.slots[index], -1)
+        if self.cache is not None:
+            self.hash ^= self.cache.zobrist.key(index, self.slots[index])
+
+    def place(self, index, placement):
+        """Put a lifted section back at a placement"""
+        self.slots[index] = placement
+        self._update(index, self.slots.sections[index], *placement, 1)
+        if self.cache is not None:
+            self.hash ^= self.cache.zobrist.key(index, placement)
+
+    def undo(self, move):
+        self.apply(move.inverse())
+
+    def score(self, move):
+        """Fitness of the schedule with the move applied, leaving the state unchanged"""
+        # Cached fitnesses carry constraint scores, which hard-only mode leaves out
+        cached = self.cache is not None and not self.hard_only
+        if cached:
+            key = self.cache.zobrist.update(self.hash, move)
+            fitness = self.cache.get(key)
+            if fitness is not None:
+                return fitness
+        self.apply(move)
+        fitness = self.fitness
+        self.undo(move)
+        if cached:
+            self.cache.put(key, fitness)
+        return fitness
+
+    def match_rooms(self, move):
+        """The move with the rooms of its sections chosen for their new hours.
+
+        A section keeps its room if that is free, else takes another free allowed
+        room, else one freed by moving the only section in it to a free room of
+        its own, which is one augmenting path of a bipartite matching of the
+        sections and rooms of those hours. A section with none keeps its room.
+        """
+        old = {part.index: part.old for part in move}
+        self.apply(move)
+        changes = []
+        for part in move:
+            index = part.index
+            day, time, room = self.slots[index]
+            if self._room_occupant(index, day, time, room) is None:
+                continue
+            section = self.slots.sections[index]
+            blocked = []
+            for other_room in section.domain.rooms:
+                occupant = self._room_occupant(index, day, time, other_room)
+                if occupant is None:
+                    changes.append(Move(index, self.slots[index], (day, time, other_room)))
+                    self.apply(changes[-1])
+                    break
+                if occupant >= 0 and occupant not in old:
+                    blocked.append((other_room, occupant))
+            else:
+                for other_room, occupant in blocked:
+                    occupant_day, occupant_time, _ = self.slots[occupant]
+                    free_room = next((
+                        free_room for free_room in self.slots.sections[occupant].domain.rooms
+                        if free_room != other_room
+                        and self._room_occupant(occupant, occupant_day, occupant_time, free_room) is None
+                    ), None)
+                    if free_room is not None:
+                        changes.append(Move(occupant, self.slots[occupant], (occupant_day, occupant_time, free_room)))
+                        self.apply(changes[-1])
+                        changes.append(Move(index, self.slots[index], (day, time, other_room)))
+                        self.apply(changes[-1])
+                        break
+
+        if not changes:
+            self.undo(move)
+            return move
+        for change in changes:
+            old.setdefault(change.index, change.old)
+        new = {index: self.slots[index] for index in old}
+        for change in reversed(changes):
+            self.undo(change)
+        self.undo(move)
+        matched = CompoundMove([Move(index, old[index], new[index]) for index in old if old[index] != new[index]])
+        matched.operator = move.operator
+        return matched
+
+    def _room_occupant(self, index, day, time, room):
+        """None if a room is free for the hours of a section starting at (day, time), the index of the only
+        other section using it in those hours, or -1 if several do"""
+        section = self.slots.sections[index]
+        own_day, own_time, own_room = self.slots[index]
+        cell = (day - 1) * self.slots_per_day + time - 1
+        own_cell = (own_day - 1) * self.slots_per_day + own_time - 1
+        occupant = None
+        for hour in range(cell, cell + section.duration):
+            key = hour * self.room_count + room
+            count = self.room_usage[key]
+            owners = self.room_owners[key]
+            if room == own_room and own_cell <= hour < own_cell + section.duration:
+                count -= 1
+                owners -= index
+            if count == 0:
+                continue
+            if count > 1 or occupant not in (None, owners):
+                return -1
+            occupant = owners
+        return occupant
+
+    def _update(self, index, section, day, time, room, step):
+        faculty = section.faculty
+        faculty_count = len(self.faculty_list)
+        group = section.group.index
+        preferred = faculty.preferred[day]
+        preferred_hours = 0
+        cell = (day - 1) * self.slots_per_day + time - 1
+        for hour in range(section.duration):
+            self.room_conflict += self._count(
+                self.room_usage, self.room_owners, (cell + hour) * self.room_count + room, index, step
+            )
+            self.faculty_conflict += self._count(
+                self.faculty_usage, self.faculty_owners, (cell + hour) * faculty_count + faculty.index, index, step
+            )
+            self.group_conflict += self._count(
+                self.group_usage, self.group_owners, (cell + hour) * self.group_count + group, index, step
+            )
+            if self.hard_only:
+                continue
+            if preferred[time + hour]:
+                preferred_hours += 1
+                self.preference_score += step * faculty.priority
+            if time + hour in self.lunch_time_slots:
+                key = group * self.max_days + day - 1
+                overlap = self.lunch_usage[key]
+                self.lunch_usage[key] = overlap + step
+                self.lunch_overlap += (overlap + step) ** 3 - overlap ** 3
+
+        if step > 0 and not self.hard_only and index not in self.fixed:
+            if preferred_hours < section.duration:
+                self.unpreferred.add(index)
+            else:
+                self.unpreferred.discard(index)
+
+    def _count(self, usage, owners, key, index, step):
+        """Update an occupancy counter and return the change in conflicts"""
+        count = usage[key]
+        usage[key] = count + step
+        owners[key] += step * index
+        if step > 0:
+            if count == 0:
+                return 0
+            if count == 1:
+                self._clash(owners[key] - index, 1)
+            self._clash(index, 1)
+            return 1
+        if count == 1:
+            return 0
+        if count == 2:
+            self._clash(owners[key], -1)
+        self._clash(index, -1)
+        return -1
+
+    def _clash(self, index, step):
+        self.clashes[index] += step
+        if self.clashes[index] == 0:
+            self.conflicted.discard(index)
+        elif step > 0 and self.clashes[index] == 1 and index not in self.fixed:
+            self.conflicted.add(index)
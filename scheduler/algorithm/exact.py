@@ -0,0 +1,166 @@
+import time
+
+from .fitness import Fitness, LUNCH_TIME_SLOTS, LUNCH_DAY_SCORE
+from .genetic import Schedule, Solver
+from .slot_array import SlotArray
+
+
+class ExactSolver(Solver):
+    """Depth-first branch and bound over conflict-free schedules, for small timetables.
+
+    Sections are assigned in MRV order (fewest remaining placements first).
+    After every assignment the placements of the other sections that would
+    clash with it are removed, and a branch is abandoned as soon as a section
+    has none left or its best reachable constraint score cannot beat the best
+    schedule found. Every better schedule is yielded, and `proven` is set when
+    the search finishes within the time limit. Sections sharing a representative
+    are interchangeable and only placed in index order.
+    """
+
+    def __init__(self, sections, room_list, faculty_list, days_per_week, slots_per_day, group_count, fnDisplay,
+                 lunch_time_slots=LUNCH_TIME_SLOTS, representatives=None):
+        self.sections = sections
+        self.representatives = representatives if representatives is not None else list(range(len(sections)))
+        self.room_list = room_list
+        self.display = fnDisplay
+        self.max_days = days_per_week
+        self.lunch_time_slots = set(lunch_time_slots)
+        self.max_score = max(sum(faculty.max_score for faculty in faculty_list), 1)
+        self.zero_overlap_score = max(group_count * days_per_week * LUNCH_DAY_SCORE, 1)
+        self.proven = False    # Whether the last search finished, so its best schedule is optimal
+        self.nodes = 0
+        self.deadline = None
+        self.timed_out = False
+        self.placements = []
+        self.lunch_usage = {}    # (group, day) -> lunch hours of the partial schedule
+        self.preferred_hours = {}    # faculty index -> preferred hours taught in the partial schedule
+        self.best_score = None
+
+        # A faculty never teaches two sections at once, so its preferred cells cap its preference score
+        self.preferred_cells = {faculty.index: sum(map(sum, faculty.preferred)) for faculty in faculty_list}
+        self.priorities = {faculty.index: faculty.priority for faculty in faculty_list}
+
+        # (day, time, room, preference score, lunch hours, preferred hours) of every placement, most preferred first
+        self.values = []
+        for section in sections:
+            values = []
+            for day, start in section.domain.starts:
+                hours = range(start, start + section.duration)
+                preferred = sum(section.faculty.preferred[day][hour] for hour in hours)
+                lunch = sum(hour in self.lunch_time_slots for hour in hours)
+                values.extend(
+                    (day, start, room, section.faculty.priority * preferred, lunch, preferred) for room in section.domain.rooms
+                )
+            values.sort(key=lambda value: (-value[3], value[4]))
+            self.values.append(values)
+
+    def _compatible(self, index, value, other, other_value):
+        """Whether two placements can coexist without a room, faculty or group clash, and in index order if
+        the sections are interchangeable"""
+        if self.representatives[index] == self.representatives[other] and (value[:2] < other_value[:2]) != (index < other):
+            return False
+        if value[0] != other_value[0]:
+            return True
+        section = self.sections[index]
+        other_section = self.sections[other]
+        if value[1] >= other_value[1] + other_section.duration or other_value[1] >= value[1] + section.duration:
+            return True
+        return (
+            value[2] != other_value[2]
+            and section.faculty.index != other_section.faculty.index
+            and section.group.index != other_section.group.index
+        )
+
+    def _score(self, preference, lunch_overlap):
+        return 80 * preference / self.max_score + 20 * (self.zero_overlap_score - lunch_overlap) / self.zero_overlap_score
+
+    def _reachable(self, domains):
+        """Optimistic preference score of the unassigned sections: each at its most preferred
+        remaining placement, capped by the preferred cells its faculty has left, which earn
+        nothing at best for a faculty without a positive priority"""
+        faculty_scores = {}
+        for index, values in domains.items():
+            faculty = self.sections[index].faculty.index
+            faculty_scores[faculty] = faculty_scores.get(faculty, 0) + values[0][3]
+        return sum(
+            min(score, max(0, self.priorities[faculty]) * (self.preferred_cells[faculty] - self.preferred_hours[faculty]))
+            for faculty, score in faculty_scores.items()
+        )
+
+    def _get_improvement(self, start_time, time_limit, seed=None):
+        self.proven = False
+        self.nodes = 0
+        self.deadline = start_time + time_limit
+        self.timed_out = False
+        self.placements = [None] * len(self.sections)
+        self.lunch_usage = {}
+        self.preferred_hours = dict.fromkeys(self.preferred_cells, 0)
+        self.best_score = None
+
+        domains = dict(enumerate(self.values))
+        if all(domains.values()):
+            yield from self._search(domains, 0, 0)
+        self.proven = not self.timed_out
+        if self.timed_out:
+            self.stop_reason = 'TIME_LIMIT'
+
+    def _search(self, domains, preference, lunch_overlap):
+        self.nodes += 1
+        if self.nodes % 256 == 0 and time.time() > self.deadline:
+            self.timed_out = True
+        if self.timed_out:
+            return
+
+        if not domains:
+            score = self._score(preference, lunch_overlap)
+            if self.best_score is None or score > self.best_score:
+                self.best_score = score
+                yield self._schedule(preference, lunch_overlap)
+            return
+
+        # Optimistic bound: the preference score still reachable, with lunch overlap as it is
+        if self.best_score is not None and self._score(preference + self._reachable(domains), lunch_overlap) <= self.best_score:
+            return
+
+        index = min(domains, key=lambda other: len(domains[other]))
+        values = domains.pop(index)
+        reachable = preference + self._reachable(domains)
+        faculty = self.sections[index].faculty
+        group = self.sections[index].group.index
+        for value in values:
+            day, start, room, value_preference, lunch, value_hours = value
+            key = (group, day)
+            usage = self.lunch_usage.get(key, 0)
+            value_overlap = lunch_overlap + (usage + lunch) ** 3 - usage ** 3
+            if self.best_score is not None and self._score(reachable + value_preference, value_overlap) <= self.best_score:
+                continue
+
+            remaining = {}
+            for other, other_values in domains.items():
+                remaining[other] = [
+                    other_value for other_value in other_values
+                    if self._compatible(index, value, other, other_value)
+                ]
+                if not remaining[other]:
+                    break
+            else:
+                self.placements[index] = (day, start, room)
+                self.lunch_usage[key] = usage + lunch
+                self.preferred_hours[faculty.index] += value_hours
+                yield from self._search(remaining, preference + value_preference, value_overlap)
+                self.preferred_hours[faculty.index] -= value_hours
+                self.lunch_usage[key] = usage
+                if self.timed_out:
+                    break
+        domains[index] = values
+
+    def _schedule(self, preference, lunch_overlap):
+        slots = SlotArray(self.sections, self.room_list)
+        for index, placement in enumerate(self.placements):
+            slots[index] = placement
+        fitness = Fitness(
+            0, 0, 0,
+            preference / self.max_score,
+            (self.zero_overlap_score - lunch_overlap) / self.zero_overlap_score
+        )
+        return Schedule(slots, fitness)
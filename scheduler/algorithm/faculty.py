@@ -1,9 +1,13 @@
 class Faculty:
+    __slots__ = ('faculty_id', 'priority', 'slot_choices', 'index', 'preferred', 'max_score')
 
-    def __init__(self, faculty_id, priority, slot_choices):
+    def __init__(self, faculty_id, priority, slot_choices, index=None):
         self.faculty_id = faculty_id
         self.priority = priority
         self.slot_choices = slot_choices
+        self.index = index    # Dense id, unique per run once interned
+        self.preferred = None    # preferred[day][time] is 1 for slot choices, built at load time
+        self.max_score = 0    # Best preference score reachable with the faculty's sections
 
     def __eq__(self, other):
         return isinstance(other, Faculty) and self.faculty_id == other.faculty_id
@@ -0,0 +1,74 @@
+from collections import defaultdict
+
+
+class InfeasibleError(ValueError):
+    """Raised before the search when a timetable cannot be scheduled without conflicts"""
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__(
+            "Scheduling aborted: the timetable cannot be scheduled without conflicts.\n"
+            + "\n".join(f"- {problem}" for problem in problems)
+        )
+
+
+def seating_rooms(section, room_list):
+    """Rooms a section may be held in: those of its course, or any room when it names none, that seat its group"""
+    return [room for room in section.course.rooms or room_list if room.capacity >= section.group.size]
+
+
+def _load_problems(kind, sections_by_owner, days_per_week, slots_per_day):
+    """Problems of the faculties or groups whose sections cannot fit in the week"""
+    problems = []
+    capacity = days_per_week * slots_per_day
+    for owner, owned in sections_by_owner.items():
+        hours = sum(section.duration for section in owned)
+        if hours > capacity:
+            problems.append(f"{kind} {owner} needs {hours} hours but the week has {capacity}")
+        # Two sections longer than half a day never share a day
+        long_sections = sum(2 * section.duration > slots_per_day for section in owned)
+        if long_sections > days_per_week:
+            problems.append(
+                f"{kind} {owner} has {long_sections} sections longer than half a day but the week has {days_per_week} days"
+            )
+    return problems
+
+
+def analyse(sections, room_list, days_per_week, slots_per_day):
+    """Reasons a timetable cannot be scheduled without conflicts, found by counting hours against capacity.
+
+    Checks every section fits in a day and has a room seating its group, every
+    faculty's and group's load against the week, and the hours of the sections
+    restricted to each pool of rooms against the hours those rooms offer.
+    """
+    problems = []
+    by_faculty = defaultdict(list)
+    by_group = defaultdict(list)
+    pools = defaultdict(int)    # Rooms a section may use -> hours of the sections restricted to them
+    unseated = set()
+    for section in sections:
+        by_faculty[section.faculty.faculty_id].append(section)
+        by_group[section.group.group_id].append(section)
+        if section.duration > slots_per_day:
+            problems.append(f"Section {section.id} lasts {section.duration} slots but a day has {slots_per_day}")
+
+        rooms = frozenset(room.room_id for room in seating_rooms(section, room_list))
+        if not rooms:
+            unseated.add((section.course.course_id, section.group.group_id, section.group.size))
+        else:
+            pools[rooms] += section.duration
+
+    for course, group, size in sorted(unseated):
+        problems.append(f"No room of course {course} seats the {size} students of group {group}")
+    problems.extend(_load_problems("Faculty", by_faculty, days_per_week, slots_per_day))
+    problems.extend(_load_problems("Group", by_group, days_per_week, slots_per_day))
+
+    # Pigeonhole over rooms: the sections confined to a pool need no more hours than it has
+    cells = days_per_week * slots_per_day
+    for pool in sorted(set(pools) | {frozenset().union(*pools)}, key=lambda pool: (len(pool), sorted(pool))):
+        hours = sum(pool_hours for other, pool_hours in pools.items() if other <= pool)
+        if hours > len(pool) * cells:
+            problems.append(
+                f"Sections limited to rooms {', '.join(sorted(pool))} need {hours} hours but those rooms offer {len(pool) * cells}"
+            )
+    return problems
@@ -1,6 +1,9 @@
 from collections import defaultdict
 
-from .date_time_slot import DateTimeSlot
+LUNCH_TIME_SLOTS = [4, 5]
+
+# Score of a group day without any lunch overlap
+LUNCH_DAY_SCORE = 9
 
 class Fitness:
 
@@ -14,6 +17,11 @@ class Fitness:
         self.lunch_overlap_ratio = lunch_overlap_ratio
         self.constraint_score = 80 * faculty_preference_ratio + 20 * lunch_overlap_ratio
 
+    @property
+    def energy(self):
+        """Scalar to minimise for acceptance rules that weigh differences: a conflict costs the whole constraint score"""
+        return 100 * self.total_conflict - self.constraint_score
+
     def __gt__(self, other):
         if self.total_conflict == other.total_conflict:
             return self.constraint_score > other.constraint_score
@@ -29,63 +37,56 @@ def get_fitness(slots, max_days, faculty_list, group_count):
     group_conflict = get_group_conflict(slots)
 
     faculty_preference_ratio = get_faculty_preference(slots, faculty_list)
-    lunch_overlap_ratio = get_lunch_overlap(slots, max_days, [4, 5], group_count)
+    lunch_overlap_ratio = get_lunch_overlap(slots, max_days, LUNCH_TIME_SLOTS, group_count)
 
     return Fitness(room_conflict, faculty_conflict, group_conflict, faculty_preference_ratio, lunch_overlap_ratio)
 
 def get_room_conflict(slots):
     room_occupied = set()
     total_rooms = 0
-    for slot in slots:
-        total_rooms += slot.section.duration
-        for hour in range(slot.section.duration):
-            room_occupied.add((slot.datetime.day, slot.datetime.time + hour, slot.room))
+    for section, day, time, room in zip(slots.sections, slots.days, slots.times, slots.rooms):
+        total_rooms += section.duration
+        for hour in range(section.duration):
+            room_occupied.add((day, time + hour, room))
     return total_rooms - len(room_occupied)
 
 def get_faculty_conflict(slots):
     faculty_assigned = set()
     total_faculties = 0
-    for slot in slots:
-        total_faculties += slot.section.duration
-        for hour in range(slot.section.duration):
-            faculty_assigned.add((slot.datetime.day, slot.datetime.time + hour, slot.section.faculty))
+    for section, day, time in zip(slots.sections, slots.days, slots.times):
+        total_faculties += section.duration
+        for hour in range(section.duration):
+            faculty_assigned.add((day, time + hour, section.faculty.index))
     return total_faculties - len(faculty_assigned)
 
 def get_group_conflict(slots):
     group_assigned = set()
     total_groups = 0
-    for slot in slots:
-        total_groups += slot.section.duration
-        for hour in range(slot.section.duration):
-            group_assigned.add((slot.datetime.day, slot.datetime.time + hour, slot.section.group))
+    for section, day, time in zip(slots.sections, slots.days, slots.times):
+        total_groups += section.duration
+        for hour in range(section.duration):
+            group_assigned.add((day, time + hour, section.group.index))
     return total_groups - len(group_assigned)
 
 def get_faculty_preference(slots, faculty_list):
-    max_score = score = 0
-
-    # Number of sections (1 hour equivalent sections) a faculty teaches in a week
-    faculty_section_count = defaultdict(int)
-    for slot in slots:
-        faculty_section_count[slot.section.faculty.faculty_id] += slot.section.duration
-        for hour in range(slot.section.duration):
-            if DateTimeSlot(slot.datetime.day, slot.datetime.time + hour) in slot.section.faculty.slot_choices:
-                score += slot.section.faculty.priority
-
-    for faculty in faculty_list:
-        max_good_slots = min(faculty_section_count[faculty.faculty_id], len(faculty.slot_choices))
-        max_score += max_good_slots * faculty.priority
-
+    score = 0
+    for section, day, time in zip(slots.sections, slots.days, slots.times):
+        preferred = section.faculty.preferred[day]
+        for hour in range(section.duration):
+            if preferred[time + hour]:
+                score += section.faculty.priority
+
+    max_score = sum(faculty.max_score for faculty in faculty_list)
     return score / max(max_score, 1)
 
 
 def get_lunch_overlap(slots, max_days, lunch_time_slots, group_count):
     group_lunch_overlap = defaultdict(int)
-    for slot in slots:
-        for hour in range(slot.section.duration):
-            if slot.datetime.time + hour in lunch_time_slots:
-                group_lunch_overlap[(slot.section.group, slot.datetime.day)] += 1
-    day_score = 9
-    zero_overlap_score = group_count * max_days * day_score
+    for section, day, time in zip(slots.sections, slots.days, slots.times):
+        for hour in range(section.duration):
+            if time + hour in lunch_time_slots:
+                group_lunch_overlap[(section.group.index, day)] += 1
+    zero_overlap_score = group_count * max_days * LUNCH_DAY_SCORE
     lunch_overlap = 0
     for value in group_lunch_overlap.values():
         lunch_overlap += value ** 3    # Give worse score for more overlap
@@ -1,77 +1,223 @@
-import copy
-import random
 import time
-from bisect import bisect_left
-from math import exp
+
+from .acceptance import AgeAcceptance, REJECT, RESTORE
 
 
 class Schedule:
     def __init__(self, slots, fitness):
         self.slots = slots
         self.fitness = fitness
-        self.age = 0    # Age of genetic line for Simulated Annealing
 
 
-class GeneticAlgorithm:
+class Solver:
+    """Base of the search strategies: subclasses yield ever better Schedules from _get_improvement
+    and keep searching while _running allows it. A restart passes _get_improvement the schedule to start
+    from, or None for a new one."""
+
+    # Plateau criteria, None to disable: seconds or evaluations without an improvement
+    stagnation_time = None
+    stagnation_evaluations = None
+    # Searches started over on a plateau while conflicts remain, from a new schedule ('fresh') or the best one ('best')
+    restarts = 0
+    restart_policy = 'fresh'
+    # Whether the evaluator counts conflicts alone until a schedule has none, then scores everything
+    two_phase = False
+    evaluator = None
+
+    # Seconds spent removing conflicts and then raising the score, once get_best returns
+    phase_times = None
+
+    stop_reason = None    # 'OPTIMAL', 'PLATEAU', 'TIME_LIMIT' or 'COMPLETED' once get_best returns
+    best = None
+    last_improvement_time = None
+    evaluations = 0    # Counted by _running since get_best was called
+    evaluations_since_improvement = 0
+    restarts_left = 0
+    conflict_free_time = None
+
+    def configure_stopping(self, stagnation_time=None, stagnation_evaluations=None, restarts=0, restart_policy='fresh'):
+        if restart_policy not in ('fresh', 'best'):
+            raise ValueError(f"Unknown restart policy '{restart_policy}'")
+        self.stagnation_time = stagnation_time
+        self.stagnation_evaluations = stagnation_evaluations
+        self.restarts = restarts
+        self.restart_policy = restart_policy
+
+    def _get_improvement(self, start_time, time_limit, seed=None):
+        raise NotImplementedError
+
+    def _start_first_phase(self):
+        """Make a new evaluator count conflicts alone, unless its schedule has none"""
+        if self.two_phase and self.evaluator.fitness.total_conflict > 0:
+            self.evaluator.set_hard_only(True)
+
+    def _end_first_phase(self, fitness):
+        """Whether the current schedule, of this fitness, ends the first phase, making the evaluator score everything"""
+        if not self.evaluator.hard_only or fitness.total_conflict > 0:
+            return False
+        self.evaluator.set_hard_only(False)
+        return True
+
+    def _running(self, start_time, time_limit, evaluations=1):
+        """Whether the search should go on, setting stop_reason when it should not"""
+        now = time.time()
+        if now - start_time > time_limit:
+            self.stop_reason = 'TIME_LIMIT'
+            return False
+        self.evaluations += evaluations
+        self.evaluations_since_improvement += evaluations
+        if self.best is None or not self._stagnating(now):
+            return True
+        # A plateau ends a conflict-free search, and one with conflicts only if it can restart
+        if self.best.fitness.total_conflict == 0 or self.restarts_left > 0:
+            self.stop_reason = 'PLATEAU'
+            return False
+        return True
+
+    def _stagnating(self, now):
+        return (
+            (self.stagnation_time is not None and now - self.last_improvement_time > self.stagnation_time)
+            or (self.stagnation_evaluations is not None and self.evaluations_since_improvement > self.stagnation_evaluations)
+        )
+
+    def get_best(self, optimal_fitness, time_limit):
+        start_time = time.time()
+        self.best = None
+        self.evaluations = 0
+        self.restarts_left = self.restarts
+        self.conflict_free_time = None
+        seed = None
+        try:
+            while True:
+                self.stop_reason = 'COMPLETED'
+                self.last_improvement_time = time.time()
+                self.evaluations_since_improvement = 0
+                for improvement in self._get_improvement(start_time, time_limit, seed):
+                    self.last_improvement_time = time.time()
+                    self.evaluations_since_improvement = 0
+                    if self.best is not None and not improvement.fitness > self.best.fitness:
+                        continue
+                    self.best = improvement
+                    if improvement.fitness.total_conflict == 0 and self.conflict_free_time is None:
+                        self.conflict_free_time = time.time()
+                    self.display(improvement)
+                    if not optimal_fitness > improvement.fitness:
+                        self.stop_reason = 'OPTIMAL'
+                        return improvement
+                if self.stop_reason != 'PLATEAU' or self.best.fitness.total_conflict == 0 or self.restarts_left == 0:
+                    return self.best
+                self.restarts_left -= 1
+                if self.restart_policy == 'best':
+                    seed = self.best.slots
+        finally:
+            end_time = time.time()
+            split = self.conflict_free_time or end_time
+            self.phase_times = (split - start_time, end_time - split)
 
-    def __init__(self, fnGetFitness, fnCreate, fnMutate, fnDisplay, max_age):
-        self.get_fitness = fnGetFitness
+
+class GeneticAlgorithm(Solver):
+
+    def __init__(self, fnGetEvaluator, fnCreate, fnMutate, fnDisplay, max_age, children=1, fnGetBatchFitness=None, focus=0, acceptance=None, fnCredit=None,
+                 room_matching=False, two_phase=False):
+        self.get_evaluator = fnGetEvaluator
         self._create = fnCreate
         self._mutate = fnMutate
         self.display = fnDisplay
-        self.max_age = max_age
+        self.children = children    # Children generated per step, the best of which is kept
+        self.get_batch_fitness = fnGetBatchFitness
+        self.focus = focus    # Probability of mutating a conflicting or badly placed slot
+        self.acceptance = acceptance if acceptance is not None else AgeAcceptance(max_age)
+        self.credit = fnCredit    # Told the outcome of every scored move
+        self.room_matching = room_matching    # Whether mutations only pick times, leaving the rooms to the evaluator
+        self.two_phase = two_phase
+        self.evaluator = None    # Tracks the fitness state of the current parent
+        self.journal = []    # Moves applied since the best schedule, None once undoing is costlier than restoring
 
-    def generate_parent(self):
-        slots = self._create()
-        return Schedule(slots, self.get_fitness(slots))
+    def generate_parent(self, seed=None):
+        if seed is not None:
+            slots = seed.copy()
+        elif self.get_batch_fitness is None or self.children == 1:
+            slots = self._create()
+        else:
+            candidates = [self._create() for _ in range(self.children)]
+            slots, _ = self._select_best(candidates, self.get_batch_fitness(candidates))
+        self.evaluator = self.get_evaluator(slots)
+        self._start_first_phase()
+        self.journal = []
+        return Schedule(slots, self.evaluator.fitness)
 
+    def _propose(self, slots):
+        move = self._mutate(slots, self.evaluator.pick(self.focus))
+        return self.evaluator.match_rooms(move) if self.room_matching else move
 
     def mutate(self, parent):
-        slots = copy.deepcopy(parent.slots)
-        self._mutate(slots)
-        fitness = self.get_fitness(slots)
-        return Schedule(slots, fitness)
-
-    def _get_improvement(self, start_time, time_limit):
-        best_parent = parent = self.generate_parent()
-        historical_fitness = [best_parent.fitness]
+        if self.children == 1:
+            move = self._propose(parent.slots)
+            fitness = self.evaluator.score(move)
+            if self.credit is not None:
+                self.credit(move, parent.fitness, fitness)
+            return move, fitness
+        moves = [self._propose(parent.slots) for _ in range(self.children)]
+        fitnesses = [self.evaluator.score(move) for move in moves]
+        if self.credit is not None:
+            for move, fitness in zip(moves, fitnesses):
+                self.credit(move, parent.fitness, fitness)
+        return self._select_best(moves, fitnesses)
+
+    @staticmethod
+    def _select_best(candidates, fitnesses):
+        best = best_fitness = None
+        for candidate, fitness in zip(candidates, fitnesses):
+            if best_fitness is None or fitness > best_fitness:
+                best, best_fitness = candidate, fitness
+        return best, best_fitness
+
+    def _accept(self, parent, move, fitness):
+        """Apply the move to the parent's slots in place and journal it"""
+        self.evaluator.apply(move)
+        if self.journal is not None:
+            self.journal.append(move)
+            if len(self.journal) > len(parent.slots):
+                self.journal = None
+        return Schedule(parent.slots, fitness)
+
+    def _revert(self, parent, best_parent):
+        """Bring the parent's slots back to the best schedule"""
+        slots = parent.slots
+        if self.journal is None:
+            slots = best_parent.slots.copy()
+            self.evaluator.reset(slots)
+        else:
+            for move in reversed(self.journal):
+                self.evaluator.undo(move)
+        self.journal = []
+        return Schedule(slots, best_parent.fitness)
+
+    def _snapshot(self, parent):
+        """Materialise the parent's slots, sharing the immutable section data"""
+        self.journal = []
+        return Schedule(parent.slots.copy(), parent.fitness)
+
+    def _get_improvement(self, start_time, time_limit, seed=None):
+        parent = self.generate_parent(seed)
+        best_parent = self._snapshot(parent)
+        self.acceptance.reset(best_parent.fitness)
         yield best_parent
-        while True:
-            if time.time() - start_time > time_limit:
-                return
-
-            child = self.mutate(parent)
-            if parent.fitness > child.fitness:
-                if self.max_age is None:
-                    continue
-                parent.age += 1
-                if self.max_age > parent.age:
-                    continue
-                index = bisect_left(historical_fitness, child.fitness, 0, len(historical_fitness))
-                proportion_similar = index / len(historical_fitness)
-                if random.random() < exp(-proportion_similar):
-                    parent = child
-                    continue
-                best_parent.age = 0
-                parent = best_parent
+        while self._running(start_time, time_limit, self.children):
+            move, fitness = self.mutate(parent)
+            decision = self.acceptance.decide(parent.fitness, fitness, best_parent.fitness)
+            if decision == REJECT:
                 continue
-            if not child.fitness > parent.fitness:
-                child.age = parent.age + 1
-                parent = child
+            if decision == RESTORE:
+                parent = self._revert(parent, best_parent)
                 continue
-            parent = child
-            if child.fitness > best_parent.fitness:
-                best_parent = child
+            parent = self._accept(parent, move, fitness)
+            if self._end_first_phase(fitness):
+                # The first conflict-free schedule, now with its constraint score
+                parent = Schedule(parent.slots, self.evaluator.fitness)
+                best_parent = self._snapshot(parent)
+                self.acceptance.reset(best_parent.fitness)
+                yield best_parent
+            elif fitness > best_parent.fitness:
+                best_parent = self._snapshot(parent)
                 yield best_parent
-                historical_fitness.append(best_parent.fitness)
-
-
-    def get_best(self, optimal_fitness, time_limit):
-        start_time = time.time()
-        last_improvement = None
-        for improvement in self._get_improvement(start_time, time_limit):
-            last_improvement = improvement
-            self.display(improvement)
-            if not optimal_fitness > improvement.fitness:
-                return improvement
-        return last_improvement
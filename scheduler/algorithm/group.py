@@ -1,8 +1,10 @@
 class Group:
+    __slots__ = ('group_id', 'size', 'index')
 
-    def __init__(self, group_id, size):
+    def __init__(self, group_id, size, index=None):
         self.group_id = group_id
         self.size = size
+        self.index = index    # Dense id, unique per run once interned
 
     def __eq__(self, other):
         return isinstance(other, Group) and self.group_id == other.group_id
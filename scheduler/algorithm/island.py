@@ -0,0 +1,128 @@
+import random
+import time
+from array import array
+
+import billiard
+from billiard.connection import wait
+
+from .genetic import Schedule, Solver
+
+
+def _encode(slots):
+    """Picklable form of a SlotArray, without the shared section data"""
+    return slots.days.tobytes(), slots.times.tobytes(), slots.rooms.tobytes()
+
+
+def _decode(template, encoded):
+    slots = template.copy()
+    slots.days, slots.times, slots.rooms = (array('h', data) for data in encoded)
+    return slots
+
+
+def _run_island(seed, fnCreateSolver, fnCreate, optimal_fitness, end_time, migration_interval, connection):
+    """Run a solver in epochs, trading the island's best for the global best after each one.
+    Every report also counts the evaluations of the epoch."""
+    random.seed(seed)
+    migrant = None
+    best = None
+
+    def fnCreateIsland():
+        return migrant.copy() if migrant is not None else fnCreate()
+
+    solver = fnCreateSolver(fnCreateIsland)
+    try:
+        # The first epoch runs even if the time is up, so that the parent has a schedule
+        while True:
+            improvement = solver.get_best(optimal_fitness, max(min(migration_interval, end_time - time.time()), 0))
+            if best is None or improvement.fitness > best.fitness:
+                best = improvement
+            connection.send((_encode(best.slots), best.fitness, solver.evaluations))
+            encoded, fitness = connection.recv()
+            if time.time() >= end_time:
+                break
+            migrant = _decode(best.slots, encoded) if fitness > best.fitness else best.slots
+    except (EOFError, OSError):
+        pass    # The parent stopped listening
+    finally:
+        connection.close()
+
+
+class IslandModel(Solver):
+    """Runs a solver per worker process on the same problem with different seeds.
+
+    Every `migration_interval` seconds each island reports its best schedule
+    to the parent and continues from the global best if that is better. The
+    plateau criteria apply to the global best, counting the evaluations of all
+    islands.
+    """
+
+    def __init__(self, fnCreateSolver, fnCreate, fnDisplay, islands, migration_interval=5):
+        self.create_solver = fnCreateSolver
+        self._create = fnCreate
+        self.display = fnDisplay
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.optimal_fitness = None
+
+    def get_best(self, optimal_fitness, time_limit):
+        self.optimal_fitness = optimal_fitness
+        return super().get_best(optimal_fitness, time_limit)
+
+    def _get_improvement(self, start_time, time_limit, seed=None):
+        # A restart starts every island from its seed schedule
+        create = seed.copy if seed is not None else self._create
+        template = create()
+        end_time = start_time + time_limit
+        context = billiard.get_context('fork')
+
+        processes = []
+        connections = []
+        for _ in range(self.islands):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(
+                target=_run_island,
+                args=(random.getrandbits(32), self.create_solver, create, self.optimal_fitness,
+                      end_time, self.migration_interval, child_connection),
+                daemon=True
+            )
+            process.start()
+            child_connection.close()
+            processes.append(process)
+            connections.append(parent_connection)
+
+        best = None
+        evaluations = 0    # Reported by the islands since the last check
+        try:
+            # The islands report one last time at the end of the time limit. Their first reports
+            # are waited for however long they take, so that there is always a best schedule.
+            while connections and (best is None or self._running(start_time, time_limit + self.migration_interval, evaluations)):
+                evaluations = 0
+                timeout = None if best is None else max(end_time - time.time(), 0) + self.migration_interval
+                ready = wait(connections, timeout=timeout)
+                if not ready:
+                    self.stop_reason = 'TIME_LIMIT'
+                    return
+                for connection in ready:
+                    try:
+                        encoded, fitness, island_evaluations = connection.recv()
+                    except EOFError:
+                        connections.remove(connection)
+                        continue
+                    evaluations += island_evaluations
+                    improved = best is None or fitness > best.fitness
+                    if improved:
+                        best = Schedule(_decode(template, encoded), fitness)
+                    try:
+                        connection.send((_encode(best.slots), best.fitness))
+                    except OSError:
+                        connections.remove(connection)
+                    if improved:
+                        yield best
+            if not connections:
+                self.stop_reason = 'TIME_LIMIT'    # Every island ran until the end
+        finally:
+            for connection in connections:
+                connection.close()
+            for process in processes:
+                process.terminate()
+                process.join()
@@ -0,0 +1,139 @@
+import random
+
+from .genetic import Schedule, Solver
+from .move import CompoundMove, Move
+
+
+class LargeNeighbourhoodSearch(Solver):
+    """Destroy and repair: every step lifts all sections of one group, day or faculty and places them again.
+
+    The repair is a depth-first branch and bound over the lifted sections, on the
+    occupancy the others leave in the evaluator. It tries each section's placements
+    best first, so its first descent is the greedy repair, and it goes on looking
+    for a better one until `repair_nodes` placements have been tried. The repaired
+    schedule replaces the current one unless it is worse.
+    """
+
+    def __init__(self, fnGetEvaluator, fnCreate, fnDisplay, destroy_size=8, repair_nodes=2000, focus=0, two_phase=False):
+        self.get_evaluator = fnGetEvaluator
+        self._create = fnCreate
+        self.display = fnDisplay
+        self.destroy_size = destroy_size    # Most sections lifted per step, sampled from the chosen set
+        self.repair_nodes = repair_nodes
+        self.focus = focus    # Probability of destroying around a conflicting or badly placed section
+        self.two_phase = two_phase
+        self.evaluator = None
+        self.by_group = None
+        self.by_faculty = None
+        self.nodes = 0
+        self.incumbent = None    # Best repair found in the current step: (fitness, placements)
+
+    def _destroy(self, slots):
+        """Sections of the group, day or faculty of a section, at most destroy_size of them"""
+        index = self.evaluator.pick(self.focus)
+        if index is None:
+            index = random.randrange(len(slots))
+        section = slots.sections[index]
+        kind = random.randrange(3)
+        if kind == 0:
+            indices = self.by_group[section.group.index]
+        elif kind == 1:
+            indices = self.by_faculty[section.faculty.index]
+        else:
+            day = slots.days[index]
+            indices = [other for other in range(len(slots)) if slots.days[other] == day]
+        if len(indices) > self.destroy_size:
+            indices = [index] + random.sample([other for other in indices if other != index], self.destroy_size - 1)
+        return indices
+
+    def _repair(self, slots, indices):
+        """Move placing the lifted sections best, or None if no placement beats the current one"""
+        old = [slots[index] for index in indices]
+        current = self.evaluator.fitness
+        for index in indices:
+            self.evaluator.lift(index)
+
+        # Longest sections with the fewest placements first
+        order = sorted(
+            indices,
+            key=lambda index: (-slots.sections[index].duration, len(slots.sections[index].domain.starts) * len(slots.sections[index].domain.rooms))
+        )
+        # Most preference score each lifted section can still add, for the bound
+        optimistic = [0] * (len(order) + 1)
+        for depth in range(len(order) - 1, -1, -1):
+            section = slots.sections[order[depth]]
+            optimistic[depth] = optimistic[depth + 1] + 80 * max(0, section.faculty.priority) * section.duration / max(self.evaluator.max_score, 1)
+
+        self.nodes = 0
+        self.incumbent = (current, None)
+        self._search(slots, order, 0, optimistic)
+
+        for index, placement in zip(indices, old):
+            self.evaluator.place(index, placement)
+        fitness, placements = self.incumbent
+        if placements is None:
+            return None, current
+        move = CompoundMove([
+            Move(index, previous, placements[index]) for index, previous in zip(indices, old) if placements[index] != previous
+        ])
+        return (move if move.moves else None), fitness
+
+    def _search(self, slots, order, depth, optimistic):
+        if depth == len(order):
+            fitness = self.evaluator.fitness
+            if not self.incumbent[0] > fitness:
+                self.incumbent = (fitness, {index: slots[index] for index in order})
+            return
+
+        index = order[depth]
+        domain = slots.sections[index].domain
+        options = []
+        for day, time in domain.starts:
+            for room in domain.rooms:
+                self.evaluator.place(index, (day, time, room))
+                fitness = self.evaluator.fitness
+                options.append(((-fitness.total_conflict, fitness.constraint_score, random.random()), fitness, (day, time, room)))
+                self.evaluator.lift(index)
+        self.nodes += len(options)
+        options.sort(key=lambda option: option[0], reverse=True)
+
+        for _, fitness, placement in options:
+            best = self.incumbent[0]
+            # Later sections only add conflicts, and at most their optimistic preference score
+            if fitness.total_conflict > best.total_conflict:
+                break
+            if fitness.total_conflict == best.total_conflict and fitness.constraint_score + optimistic[depth + 1] < best.constraint_score:
+                break
+            self.evaluator.place(index, placement)
+            self._search(slots, order, depth + 1, optimistic)
+            self.evaluator.lift(index)
+            if self.nodes >= self.repair_nodes:
+                break
+
+    def _start(self, slots):
+        """Track a new schedule and index its sections by group and faculty"""
+        self.evaluator = self.get_evaluator(slots)
+        self._start_first_phase()
+        self.by_group = {}
+        self.by_faculty = {}
+        for index, section in enumerate(slots.sections):
+            self.by_group.setdefault(section.group.index, []).append(index)
+            self.by_faculty.setdefault(section.faculty.index, []).append(index)
+
+    def _get_improvement(self, start_time, time_limit, seed=None):
+        slots = seed.copy() if seed is not None else self._create()
+        self._start(slots)
+
+        best = Schedule(slots.copy(), self.evaluator.fitness)
+        yield best
+        while self._running(start_time, time_limit, self.nodes):
+            move, fitness = self._repair(slots, self._destroy(slots))
+            if move is None:
+                continue
+            self.evaluator.apply(move)
+            if self._end_first_phase(fitness):
+                best = Schedule(slots.copy(), self.evaluator.fitness)
+                yield best
+            elif fitness > best.fitness:
+                best = Schedule(slots.copy(), fitness)
+                yield best
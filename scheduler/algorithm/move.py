@@ -0,0 +1,35 @@
+class Move:
+    """Reversible reassignment of one section to a new (day, time, room index)"""
+
+    def __init__(self, index, old, new):
+        self.index = index
+        self.old = old
+        self.new = new
+        self.operator = None    # Name of the operator that proposed it
+
+    def __iter__(self):
+        """A Move is a compound of itself alone"""
+        return iter((self,))
+
+    def inverse(self):
+        return Move(self.index, self.new, self.old)
+
+    def __str__(self):
+        return f"Slot {self.index}: {self.old} -> {self.new}"
+
+
+class CompoundMove:
+    """Moves of distinct sections applied together, in order"""
+
+    def __init__(self, moves):
+        self.moves = moves
+        self.operator = None
+
+    def __iter__(self):
+        return iter(self.moves)
+
+    def inverse(self):
+        return CompoundMove([move.inverse() for move in reversed(self.moves)])
+
+    def __str__(self):
+        return ", ".join(str(move) for move in self.moves)
@@ -0,0 +1,79 @@
+import random
+
+
+class OperatorStats:
+    __slots__ = ('uses', 'successes', 'total_gain', 'quality')
+
+    def __init__(self, quality):
+        self.uses = 0
+        self.successes = 0
+        self.total_gain = 0    # Sum of energy decreases of the improving moves
+        self.quality = quality    # Recency weighted success rate
+
+
+class OperatorSelector:
+    """Chooses among move operators by adaptive probability matching.
+
+    Every operator's selection probability follows its recency weighted
+    rate of improving moves, with a floor of `min_probability` so no
+    operator is starved. Operators map a name to fnOperator(slots, index)
+    returning a move or None; the first operator is used whenever the
+    chosen one returns None and must always return a move. Moves of no
+    particular section start from one of `indices`, by default any.
+    """
+
+    def __init__(self, operators, adaptation_rate=0.01, min_probability=0.05, indices=None):
+        self.names = list(operators)
+        self.operators = operators
+        self.indices = indices
+        self.adaptation_rate = adaptation_rate
+        self.min_probability = min(min_probability, 1 / len(self.names))
+        self.stats = {name: OperatorStats(1 / len(self.names)) for name in self.names}
+        self.probabilities = [1 / len(self.names)] * len(self.names)
+
+    def mutate(self, slots, index=None):
+        if index is None and self.indices:
+            index = random.choice(self.indices)
+        name = random.choices(self.names, self.probabilities)[0]
+        move = self.operators[name](slots, index)
+        if move is None:
+            # An operator with nothing to offer is adapted as if its move had failed
+            self._adapt(name, False)
+            name = self.names[0]
+            move = self.operators[name](slots, index)
+        move.operator = name
+        return move
+
+    def credit(self, move, parent_fitness, fitness):
+        """Record the outcome of a scored move and adapt the selection probabilities"""
+        stats = self.stats[move.operator]
+        stats.uses += 1
+        improved = fitness > parent_fitness
+        if improved:
+            stats.successes += 1
+            stats.total_gain += parent_fitness.energy - fitness.energy
+        self._adapt(move.operator, improved)
+
+    def _adapt(self, name, improved):
+        stats = self.stats[name]
+        stats.quality += self.adaptation_rate * (improved - stats.quality)
+
+        qualities = [self.stats[name].quality for name in self.names]
+        total = sum(qualities)
+        adaptive = 1 - len(self.names) * self.min_probability
+        self.probabilities = [
+            self.min_probability + adaptive * (quality / total if total else 1 / len(self.names))
+            for quality in qualities
+        ]
+
+    def get_stats(self):
+        """Uses, success rate, mean gain per improvement and current probability of every operator"""
+        return {
+            name: {
+                'uses': stats.uses,
+                'success_rate': stats.successes / stats.uses if stats.uses else 0,
+                'mean_gain': stats.total_gain / stats.successes if stats.successes else 0,
+                'probability': probability,
+            }
+            for (name, stats), probability in zip(self.stats.items(), self.probabilities)
+        }
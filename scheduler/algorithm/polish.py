@@ -0,0 +1,67 @@
+import time
+
+
+def _best_placement(evaluator, index, first):
+    """Placement of a section that improves the evaluator's schedule most, or the first one found that does,
+    with its fitness: (None, None) if none improves"""
+    slots = evaluator.slots
+    current = slots[index]
+    best, best_fitness = None, evaluator.fitness
+    domain = slots.sections[index].domain
+    evaluator.lift(index)
+    for day, time_slot in domain.starts:
+        for room in domain.rooms:
+            placement = (day, time_slot, room)
+            if placement == current:
+                continue
+            evaluator.place(index, placement)
+            fitness = evaluator.fitness
+            evaluator.lift(index)
+            if fitness > best_fitness:
+                best, best_fitness = placement, fitness
+                if first:
+                    break
+        if first and best is not None:
+            break
+    evaluator.place(index, current)
+    return (best, best_fitness) if best is not None else (None, None)
+
+
+def polish(evaluator, time_limit, strategy='first', indices=None):
+    """Descend from the evaluator's schedule by moving one section at a time until no move improves it.
+
+    Every (start, room) of every section in `indices`, all of them by default, is
+    tried. The 'first' strategy applies each improving move as soon as it is
+    found, going round the sections in order, and 'best' applies the most
+    improving move of the whole neighbourhood each time. Returns the number of
+    moves applied and whether the schedule is a local optimum, which it may not
+    be if `time_limit` seconds ran out first.
+    """
+    if strategy not in ('first', 'best'):
+        raise ValueError(f"Unknown polishing strategy '{strategy}'")
+    start_time = time.time()
+    indices = range(len(evaluator.slots)) if indices is None else indices
+    moves = 0
+    improved = True
+    while improved:
+        improved = False
+        chosen = chosen_fitness = None
+        for index in indices:
+            if time.time() - start_time > time_limit:
+                return moves, False
+            placement, fitness = _best_placement(evaluator, index, strategy == 'first')
+            if placement is None:
+                continue
+            if strategy == 'first':
+                evaluator.lift(index)
+                evaluator.place(index, placement)
+                moves += 1
+                improved = True
+            elif chosen_fitness is None or fitness > chosen_fitness:
+                chosen, chosen_fitness = (index, placement), fitness
+        if chosen is not None:
+            evaluator.lift(chosen[0])
+            evaluator.place(*chosen)
+            moves += 1
+            improved = True
+    return moves, True
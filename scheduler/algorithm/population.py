@@ -0,0 +1,132 @@
+import random
+from array import array
+
+import numpy as np
+
+from .genetic import Schedule, Solver
+
+
+def uniform_crossover(parent, other, rng):
+    """Child taking each section's placement from either parent"""
+    return _combine(parent, other, rng.random(len(parent)) < 0.5)
+
+
+def group_crossover(parent, other, rng, section_groups, group_count):
+    """Child taking the placements of all sections of a group from the same parent"""
+    return _combine(parent, other, (rng.random(group_count) < 0.5)[section_groups])
+
+
+def _combine(parent, other, mask):
+    child = parent.copy()
+    for name in ('days', 'times', 'rooms'):
+        values = np.where(
+            mask,
+            np.frombuffer(getattr(other, name), dtype=np.int16),
+            np.frombuffer(getattr(parent, name), dtype=np.int16)
+        )
+        setattr(child, name, array('h', values.tobytes()))
+    return child
+
+
+def get_key(slots):
+    """Identity of a schedule, used to eliminate duplicates from the population"""
+    return slots.days.tobytes() + slots.times.tobytes() + slots.rooms.tobytes()
+
+
+class PopulationAlgorithm(Solver):
+    """Generational genetic algorithm with tournament selection, crossover and elitism.
+
+    With a FitnessCache, schedules are identified by their Zobrist hash and
+    only those not seen recently are scored.
+    """
+
+    def __init__(self, fnGetBatchFitness, fnCreate, fnMutate, fnDisplay,
+                 population_size=50, tournament_size=3, elite_size=2, crossover_rate=0.9, max_mutations=2, cache=None):
+        self.get_batch_fitness = fnGetBatchFitness
+        self._create = fnCreate
+        self._mutate = fnMutate
+        self.display = fnDisplay
+        self.population_size = population_size
+        self.tournament_size = tournament_size
+        self.elite_size = elite_size
+        self.crossover_rate = crossover_rate
+        self.max_mutations = max_mutations
+        self.cache = cache
+        self.rng = np.random.default_rng(random.getrandbits(32))
+        self.section_groups = None
+        self.group_count = 0
+
+    def _get_key(self, slots):
+        return get_key(slots) if self.cache is None else self.cache.zobrist.hash(slots)
+
+    def _evaluate(self, candidates):
+        """Score all candidates not in the cache in one batch call"""
+        if self.cache is None:
+            return [Schedule(slots, fitness) for slots, fitness in zip(candidates, self.get_batch_fitness(candidates))]
+        keys = [self.cache.zobrist.hash(slots) for slots in candidates]
+        fitnesses = [self.cache.get(key) for key in keys]
+        missing = [index for index, fitness in enumerate(fitnesses) if fitness is None]
+        if missing:
+            for index, fitness in zip(missing, self.get_batch_fitness([candidates[index] for index in missing])):
+                fitnesses[index] = fitness
+                self.cache.put(keys[index], fitness)
+        return [Schedule(slots, fitness) for slots, fitness in zip(candidates, fitnesses)]
+
+    def _unique(self, population):
+        """Sort by fitness, best first, dropping duplicate schedules"""
+        seen = set()
+        unique = []
+        for schedule in sorted(population, key=lambda schedule: schedule.fitness, reverse=True):
+            key = self._get_key(schedule.slots)
+            if key not in seen:
+                seen.add(key)
+                unique.append(schedule)
+        return unique
+
+    def _tournament(self, population):
+        contestants = random.sample(population, min(self.tournament_size, len(population)))
+        return max(contestants, key=lambda schedule: schedule.fitness)
+
+    def _breed(self, population):
+        parent = self._tournament(population)
+        if random.random() < self.crossover_rate:
+            other = self._tournament(population)
+            if random.random() < 0.5:
+                slots = uniform_crossover(parent.slots, other.slots, self.rng)
+            else:
+                slots = group_crossover(parent.slots, other.slots, self.rng, self.section_groups, self.group_count)
+        else:
+            slots = parent.slots.copy()
+        for _ in range(random.randint(1, self.max_mutations)):
+            for move in self._mutate(slots):
+                slots[move.index] = move.new
+        return slots
+
+    def _next_generation(self, population, start_time, time_limit):
+        """The elites and their offspring, best first and without duplicates, or None once time is up"""
+        offspring = []
+        while len(offspring) < self.population_size - self.elite_size:
+            if not self._running(start_time, time_limit):
+                return None
+            offspring.append(self._breed(population))
+        return self._unique(population[:self.elite_size] + self._evaluate(offspring))
+
+    def _get_improvement(self, start_time, time_limit, seed=None):
+        # Within the time limit, a smaller initial population if the schedules are slow to create.
+        # A restart keeps its seed schedule among new ones.
+        candidates = [seed.copy() if seed is not None else self._create()]
+        while len(candidates) < self.population_size and self._running(start_time, time_limit, 0):
+            candidates.append(self._create())
+        population = self._unique(self._evaluate(candidates))
+        self.section_groups = np.array([section.group.index for section in population[0].slots.sections], dtype=np.int64)
+        self.group_count = int(self.section_groups.max(initial=0)) + 1
+
+        best = population[0]
+        yield best
+        while True:
+            population = self._next_generation(population, start_time, time_limit)
+            if population is None:
+                return
+            if population[0].fitness > best.fitness:
+                best = population[0]
+                yield best
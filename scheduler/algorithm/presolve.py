@@ -0,0 +1,77 @@
+from .feasibility import InfeasibleError
+
+
+class Presolve:
+    """Reductions found before the search, on top of the section domains"""
+
+    def __init__(self, section_count):
+        self.fixed = set()    # Indices of the sections left with a single placement
+        self.removed_starts = 0    # Starts dropped because they clash with a fixed section
+        # Index of the first section identical to each one, itself if none comes before it
+        self.representatives = list(range(section_count))
+
+    @property
+    def twins(self):
+        """Sections interchangeable with an earlier one"""
+        return sum(representative != index for index, representative in enumerate(self.representatives))
+
+    def movable(self):
+        return [index for index in range(len(self.representatives)) if index not in self.fixed]
+
+    def __str__(self):
+        return f"{len(self.fixed)} sections fixed, {self.removed_starts} starts removed, {self.twins} interchangeable sections"
+
+
+def presolve(sections):
+    """Shrink the section domains before the search.
+
+    Sections with a single (start, room) placement are fixed, and the starts of
+    other sections that would clash with one are removed, which may fix them in
+    turn. Sections with the same faculty, course, group and duration are marked
+    interchangeable, so the search can ignore their order. Raises
+    InfeasibleError if a section is left with no start.
+    """
+    result = Presolve(len(sections))
+    faculty_busy = set()    # (faculty index, day, hour) held by fixed sections
+    group_busy = set()
+    room_busy = set()    # (room index, day, hour)
+
+    changed = True
+    while changed:
+        changed = False
+        for index, section in enumerate(sections):
+            domain = section.domain
+            if index not in result.fixed:
+                starts = [start for start in domain.starts if not _blocked(section, start, faculty_busy, group_busy, room_busy)]
+                if not starts:
+                    raise InfeasibleError([f"Section {section.id} has no start left that avoids the fixed sections"])
+                if len(starts) < len(domain.starts):
+                    result.removed_starts += len(domain.starts) - len(starts)
+                    domain.starts = starts
+                    domain.preferred_starts = [start for start in domain.preferred_starts if start in starts] or starts
+                    changed = True
+                if len(domain.starts) == 1 and len(domain.rooms) == 1:
+                    result.fixed.add(index)
+                    day, time = domain.starts[0]
+                    for hour in range(time, time + section.duration):
+                        faculty_busy.add((section.faculty.index, day, hour))
+                        group_busy.add((section.group.index, day, hour))
+                        room_busy.add((domain.rooms[0], day, hour))
+                    changed = True
+
+    first = {}
+    for index, section in enumerate(sections):
+        key = (section.faculty.index, section.course.course_id, section.group.index, section.duration)
+        result.representatives[index] = first.setdefault(key, index)
+    return result
+
+
+def _blocked(section, start, faculty_busy, group_busy, room_busy):
+    """Whether a start clashes with the fixed sections: their faculty or group, or every room the section may use"""
+    if not faculty_busy:
+        return False
+    day, time = start
+    hours = range(time, time + section.duration)
+    if any((section.faculty.index, day, hour) in faculty_busy or (section.group.index, day, hour) in group_busy for hour in hours):
+        return True
+    return all(any((room, day, hour) in room_busy for hour in hours) for room in section.domain.rooms)
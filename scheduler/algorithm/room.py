@@ -1,8 +1,10 @@
 class Room:
+    __slots__ = ('room_id', 'capacity', 'index')
 
-    def __init__(self, room_id, capacity):
+    def __init__(self, room_id, capacity, index=None):
         self.room_id = room_id
         self.capacity = capacity
+        self.index = index    # Dense id, unique per run once interned
 
     def __eq__(self, other):
         return isinstance(other, Room) and self.room_id == other.room_id
@@ -1,53 +1,237 @@
 import datetime
 import random
+import time
+from collections import defaultdict
 
 from scheduler.timetable.models import TimeTable
 
+import scheduler.algorithm.acceptance as acceptance
+import scheduler.algorithm.bounds as bounds
+import scheduler.algorithm.cache as cache
+import scheduler.algorithm.exact as exact
+import scheduler.algorithm.feasibility as feasibility
 import scheduler.algorithm.genetic as genetic
+import scheduler.algorithm.operators as operators
+import scheduler.algorithm.polish as polish
+import scheduler.algorithm.population as population
+import scheduler.algorithm.presolve as presolve
+import scheduler.algorithm.island as island
+import scheduler.algorithm.lns as lns
+import scheduler.algorithm.tabu as tabu
 import scheduler.algorithm.utils as utils
-from scheduler.algorithm.fitness import Fitness, get_fitness
-from scheduler.algorithm.slot import Slot
-from scheduler.algorithm.date_time_slot import DateTimeSlot
+from scheduler.algorithm.evaluator import FitnessEvaluator
+from scheduler.algorithm.batch import BatchFitnessEvaluator
+from scheduler.algorithm.slot_array import SlotArray
+from scheduler.algorithm.move import CompoundMove, Move
 
 
-def create(sections, slots_per_day, room_list):
-    slots = []
+def create(sections, room_list):
+    slots = SlotArray(sections, room_list)
+    for index, section in enumerate(sections):
+        day, time = random.choice(section.domain.preferred_starts)
+        slots[index] = (day, time, random.choice(section.domain.rooms))
+    return slots
+
+
+def construct(sections, room_list, days_per_week, slots_per_day):
+    """Greedy schedule placing the hardest sections first, each at its best free placement"""
+    slots = SlotArray(sections, room_list)
+    cells = days_per_week * slots_per_day
+    room_count = len(room_list)
+    faculty_count = max((section.faculty.index for section in sections), default=-1) + 1
+    group_count = max((section.group.index for section in sections), default=-1) + 1
+    room_busy = [0] * (cells * room_count)
+    faculty_busy = [0] * (cells * faculty_count)
+    group_busy = [0] * (cells * group_count)
+
+    faculty_load = defaultdict(int)
+    group_load = defaultdict(int)
     for section in sections:
-        preferred_slot = random.choice(section.faculty.slot_choices)
-        # Overflow of section outside the available hours
-        time_overflow = max((preferred_slot.time + section.duration) - 1 - slots_per_day, 0)
-        offset = random.randrange(time_overflow, preferred_slot.time)
-        time = preferred_slot.time - offset
-        slots.append(
-            Slot(
-                DateTimeSlot(preferred_slot.day, time),
-                random.choice(section.course.rooms) if section.course.rooms else random.choice(room_list),
-                section
-            )
-        )
+        faculty_load[section.faculty.index] += section.duration
+        group_load[section.group.index] += section.duration
+
+    # Long sections with few rooms and busy faculties and groups first, ties in random order
+    order = sorted(
+        range(len(sections)),
+        key=lambda index: (
+            sections[index].duration,
+            -len(sections[index].domain.rooms),
+            faculty_load[sections[index].faculty.index] + group_load[sections[index].group.index],
+            random.random()
+        ),
+        reverse=True
+    )
+
+    for index in order:
+        section = sections[index]
+        faculty = section.faculty.index
+        group = section.group.index
+        best_cost = None
+        candidates = []
+        for day, time in section.domain.starts:
+            cell = (day - 1) * slots_per_day + time - 1
+            hours = range(cell, cell + section.duration)
+            busy = sum(faculty_busy[hour * faculty_count + faculty] + group_busy[hour * group_count + group] for hour in hours)
+            preferred = sum(section.faculty.preferred[day][time:time + section.duration])
+            for room in section.domain.rooms:
+                clashes = busy + sum(room_busy[hour * room_count + room] for hour in hours)
+                # Fewest clashes, then most preferred hours, then the smallest room that fits
+                cost = (clashes, -preferred, room_list[room].capacity)
+                if best_cost is None or cost < best_cost:
+                    best_cost = cost
+                    candidates = [(day, time, room)]
+                elif cost == best_cost:
+                    candidates.append((day, time, room))
+
+        day, time, room = random.choice(candidates)
+        slots[index] = (day, time, room)
+        cell = (day - 1) * slots_per_day + time - 1
+        for hour in range(cell, cell + section.duration):
+            room_busy[hour * room_count + room] += 1
+            faculty_busy[hour * faculty_count + faculty] += 1
+            group_busy[hour * group_count + group] += 1
     return slots
 
 
-def mutate(slots, days_per_week, slots_per_day, room_list):
-    slot = random.choice(slots)
-    if random.random() < 0.5:
-        preferred_slot = random.choice(slot.section.faculty.slot_choices)
-        day = preferred_slot.day
-        # Overflow of section outside the available hours
-        time_overflow = max((preferred_slot.time + slot.section.duration) - 1 - slots_per_day, 0)
-        offset = random.randrange(time_overflow, preferred_slot.time)
-        time = preferred_slot.time - offset
-        slot.datetime = DateTimeSlot(day, time)
-        slot.room = random.choice(slot.section.course.rooms) if slot.section.course.rooms else random.choice(room_list)
-    else:
-        random_slot = utils.generate_random_slot(days_per_week, slots_per_day)
-        day = random_slot.day
-        # Overflow of section outside the available hours
-        time_overflow = max((random_slot.time + slot.section.duration) - 1 - slots_per_day, 0)
-        offset = random.randrange(time_overflow, random_slot.time)
-        time = random_slot.time - offset
-        slot.datetime = DateTimeSlot(day, time)
-        slot.room = random.choice(slot.section.course.rooms) if slot.section.course.rooms else random.choice(room_list)
+def assign_rooms(slots):
+    """Reassign the rooms of a schedule with its times fixed, day by day in order of start.
+
+    The sections starting at each (day, time) are matched to the allowed rooms not taken
+    by a section still running, by a maximum bipartite matching (Kuhn's augmenting paths)
+    that tries each section's current room first. Unmatched sections keep their room.
+    """
+    starting = defaultdict(list)
+    for index in range(len(slots)):
+        day, time, _ = slots[index]
+        starting[(day, time)].append(index)
+
+    busy_until = {}    # (day, room) -> first hour the room is free again
+    for day, time in sorted(starting):
+        indices = starting[(day, time)]
+        options = {}
+        for index in indices:
+            current = slots.rooms[index]
+            rooms = [room for room in slots.sections[index].domain.rooms if busy_until.get((day, room), 0) <= time]
+            options[index] = sorted(rooms, key=lambda room: room != current)
+
+        matched = {}    # room -> section index
+
+        def augment(index, visited):
+            for room in options[index]:
+                if room not in visited:
+                    visited.add(room)
+                    if room not in matched or augment(matched[room], visited):
+                        matched[room] = index
+                        return True
+            return False
+
+        for index in indices:
+            augment(index, set())
+        for room, index in matched.items():
+            slots[index] = (day, time, room)
+        for index in indices:
+            room = slots.rooms[index]
+            busy_until[(day, room)] = max(busy_until.get((day, room), 0), time + slots.sections[index].duration)
+    return slots
+
+
+def reassign(slots, index=None, preferred=False):
+    """Move a section to any start, or one covering a faculty slot choice, in a random allowed room"""
+    if index is None:
+        index = random.randrange(len(slots))
+    domain = slots.sections[index].domain
+    day, time = random.choice(domain.preferred_starts if preferred else domain.starts)
+    return Move(index, slots[index], (day, time, random.choice(domain.rooms)))
+
+
+def mutate(slots, index=None):
+    return reassign(slots, index, preferred=random.random() < 0.5)
+
+
+def move_time(slots, index=None, preferred=False):
+    """Move a section to any start, or one covering a faculty slot choice, keeping its room"""
+    if index is None:
+        index = random.randrange(len(slots))
+    domain = slots.sections[index].domain
+    day, time = random.choice(domain.preferred_starts if preferred else domain.starts)
+    return Move(index, slots[index], (day, time, slots.rooms[index]))
+
+
+def move_room(slots, index=None):
+    """Move a section to a random allowed room, keeping its start"""
+    if index is None:
+        index = random.randrange(len(slots))
+    day, time, _ = slots[index]
+    return Move(index, slots[index], (day, time, random.choice(slots.sections[index].domain.rooms)))
+
+
+def swap(slots, related, index=None):
+    """Exchange the placements of a section and one sharing its faculty or group, keeping a room the other
+    may not use, or None if there is no such section or either start is outside the other's domain"""
+    if index is None:
+        index = random.randrange(len(slots))
+    if not related[index]:
+        return None
+    other = random.choice(related[index])
+    section = slots.sections[index]
+    other_section = slots.sections[other]
+    day, time, room = slots[index]
+    other_day, other_time, other_room = slots[other]
+    if not section.domain.allows((other_day, other_time)) or not other_section.domain.allows((day, time)):
+        return None
+    return CompoundMove([
+        Move(index, slots[index], (other_day, other_time, other_room if other_room in section.domain.rooms else room)),
+        Move(other, slots[other], (day, time, room if room in other_section.domain.rooms else other_room))
+    ])
+
+
+def kempe_chain(slots, related, index=None):
+    """Exchange two start times between the sections chained to a section by shared faculties or groups.
+
+    Starting from the section, every section sharing a faculty or group with one that moves and
+    starting where that one moves to is moved the other way, so no new faculty or group clash of
+    equally long sections is created. None if a chained section may not start where it would move.
+    """
+    if index is None:
+        index = random.randrange(len(slots))
+    day, time, _ = slots[index]
+    first = (day, time)
+    second = random.choice(slots.sections[index].domain.starts)
+    if second == first:
+        return None
+    destinations = {first: second, second: first}
+
+    chain = [index]
+    chained = {index}
+    for member in chain:
+        member_day, member_time, _ = slots[member]
+        destination = destinations[(member_day, member_time)]
+        for other in related[member]:
+            if other not in chained and slots[other][:2] == destination:
+                chained.add(other)
+                chain.append(other)
+
+    moves = []
+    for member in chain:
+        member_day, member_time, room = slots[member]
+        new_day, new_time = destinations[(member_day, member_time)]
+        if not slots.sections[member].domain.allows((new_day, new_time)):
+            return None
+        moves.append(Move(member, slots[member], (new_day, new_time, room)))
+    return CompoundMove(moves)
+
+
+def neighbour(slots, related, index=None):
+    """Random time, room, swap or Kempe chain move"""
+    kind = random.randrange(4)
+    move = None
+    if kind == 2:
+        move = swap(slots, related, index)
+    elif kind == 3:
+        move = kempe_chain(slots, related, index)
+    if move is not None:
+        return move
+    return move_room(slots, index) if kind == 1 else move_time(slots, index)
 
 
 def display(schedule, start_time):
@@ -59,6 +243,33 @@ class Scheduler():
         self.org_id = kwargs['org_id']
         self.timetable_id = kwargs['timetable_id']
         self.time_limit = kwargs['time_limit']
+        self.children = kwargs.get('children', 1)
+        self.strategy = kwargs.get('strategy', 'genetic')
+        self.population_size = kwargs.get('population_size', 50)
+        self.islands = kwargs.get('islands', 1)
+        self.migration_interval = kwargs.get('migration_interval', 5)
+        self.focus = kwargs.get('focus', 0.5)
+        self.tabu_tenure = kwargs.get('tabu_tenure', 10)
+        self.neighbourhood_size = kwargs.get('neighbourhood_size', 50)
+        self.destroy_size = kwargs.get('destroy_size', 8)
+        self.acceptance = kwargs.get('acceptance', 'age')
+        self.exact_threshold = kwargs.get('exact_threshold', 12)
+        self.stagnation_time = kwargs.get('stagnation_time')
+        self.stagnation_evaluations = kwargs.get('stagnation_evaluations')
+        self.restarts = kwargs.get('restarts', 0)
+        self.restart_policy = kwargs.get('restart_policy', 'fresh')
+        self.cache_size = kwargs.get('cache_size', 100000)
+        self.room_matching = kwargs.get('room_matching', False)
+        self.two_phase = kwargs.get('two_phase', False)
+        self.polish_time = kwargs.get('polish_time', 0)    # Seconds of polishing after the search, on top of time_limit
+        self.polish_strategy = kwargs.get('polish_strategy', 'first')
+        self.stop_reason = None    # Why the search ended, set by run
+        self.operator_stats = {}    # Uses, success rate and gain of each move operator, set by run
+        self.cache_stats = {}    # Hits, misses and hit rate of the fitness cache, set by run
+        self.presolve_stats = {}    # Sections fixed, starts removed and interchangeable sections, set by run
+        self.phase_times = None    # Seconds the search spent removing conflicts and raising the score, set by run
+        self.polish_stats = {}    # Moves, local optimum and seconds of the polishing pass, set by run
+        self.bound_stats = {}    # Constraint score bound and seconds spent computing it, set by run
 
     def run(self):
         start_time = datetime.datetime.now()
@@ -67,15 +278,29 @@ class Scheduler():
         timetable_id = self.timetable_id
 
         days_per_week, slots_per_day = utils.get_days_and_slots(org_id)
-        room_list = utils.get_rooms(org_id=org_id)
-        faculty_list = utils.get_faculties(org_id=org_id)
-        group_count, sections = utils.get_group_count_and_sections(org_id=org_id, timetable_id=timetable_id)
+        # Shared by all loaders so each room, faculty, course and group exists once
+        registry = utils.Registry()
+        room_list = utils.get_rooms(org_id=org_id, registry=registry)
+        faculty_list = utils.get_faculties(org_id=org_id, registry=registry)
+        group_count, sections = utils.get_group_count_and_sections(org_id=org_id, timetable_id=timetable_id, registry=registry)
+        utils.build_faculty_preferences(faculty_list, sections, days_per_week, slots_per_day)
 
         if group_count == 0 or not sections:
             raise ValueError(
                 "Scheduling aborted: the timetable has no sections. Add at least one section before running the scheduler."
             )
 
+        # Fail fast instead of searching the whole time limit for a schedule that cannot exist
+        problems = feasibility.analyse(sections, room_list, days_per_week, slots_per_day)
+        if problems:
+            raise feasibility.InfeasibleError(problems)
+        utils.build_section_domains(sections, room_list, days_per_week, slots_per_day)
+        presolved = presolve.presolve(sections)
+        self.presolve_stats = {
+            'fixed': len(presolved.fixed), 'removed_starts': presolved.removed_starts, 'twins': presolved.twins
+        }
+        print(f"Presolve: {presolved}")
+
         print(f"Group Count: {group_count}")
 
         for room in room_list:
@@ -88,23 +313,172 @@ class Scheduler():
             print(f"{section}")
 
 
-        def fnGetFitness(slots):
-            return get_fitness(slots, days_per_week, faculty_list, group_count)
+        # Fitness of recently seen schedules, keyed by their Zobrist hash, unless the cache is disabled
+        fitness_cache = None
+        if self.cache_size > 0:
+            fitness_cache = cache.FitnessCache(
+                cache.ZobristTable(len(sections), days_per_week, slots_per_day, len(room_list)), self.cache_size
+            )
+
+        def fnGetEvaluator(slots):
+            return FitnessEvaluator(
+                slots, days_per_week, slots_per_day, faculty_list, group_count, cache=fitness_cache, fixed=presolved.fixed
+            )
+
+        batch_evaluator = BatchFitnessEvaluator(sections, days_per_week, slots_per_day, faculty_list, len(room_list), group_count)
+
+        def fnGetBatchFitness(candidates):
+            return batch_evaluator.evaluate(candidates)
 
         def fnCreate():
-            return create(sections, slots_per_day, room_list)
+            slots = construct(sections, room_list, days_per_week, slots_per_day)
+            return assign_rooms(slots) if self.room_matching else slots
+
+        # Fixed sections never move, and exchanging interchangeable ones changes nothing
+        related = [
+            [other for other in others if other not in presolved.fixed and presolved.representatives[other] != presolved.representatives[index]]
+            for index, others in enumerate(utils.get_related_sections(sections))
+        ]
+        movable = presolved.movable()
 
-        def fnMutate(slots):
-            return mutate(slots, days_per_week, slots_per_day, room_list)
+        def fnSwap(slots, index=None):
+            return swap(slots, related, index)
+
+        def fnKempeChain(slots, index=None):
+            return kempe_chain(slots, related, index)
+
+        # Operators are picked by how often they improve the schedule, starting uniformly.
+        # With room matching they only change times and the evaluator picks the rooms.
+        if self.room_matching:
+            selector = operators.OperatorSelector({
+                'time': move_time, 'preferred': lambda slots, index=None: move_time(slots, index, preferred=True),
+                'swap': fnSwap, 'kempe': fnKempeChain
+            }, indices=movable)
+        elif self.strategy == 'tabu':
+            selector = operators.OperatorSelector({
+                'time': move_time, 'room': move_room, 'swap': fnSwap, 'kempe': fnKempeChain
+            }, indices=movable)
+        else:
+            selector = operators.OperatorSelector({
+                'random': reassign, 'preferred': lambda slots, index=None: reassign(slots, index, preferred=True),
+                'swap': fnSwap, 'kempe': fnKempeChain
+            }, indices=movable)
 
         def fnDisplay(schedule):
             display(schedule, start_time)
 
-        max_age = 100
-        scheduler = genetic.GeneticAlgorithm(fnGetFitness, fnCreate, fnMutate, fnDisplay, max_age)
+        def fnGetAcceptance(max_age):
+            if self.acceptance == 'age':
+                return acceptance.AgeAcceptance(max_age)
+            if self.acceptance == 'annealing':
+                return acceptance.SimulatedAnnealing()
+            if self.acceptance == 'late':
+                return acceptance.LateAcceptance()
+            if self.acceptance == 'deluge':
+                return acceptance.GreatDeluge()
+            raise ValueError(f"Unknown acceptance criterion '{self.acceptance}'")
 
-        optimal_fitness = Fitness(0, 0, 0, 1, 1)
-        best = scheduler.get_best(optimal_fitness, self.time_limit)
+        def fnCreateGenetic(fnCreateSlots, fnShow):
+            max_age = 100
+            return genetic.GeneticAlgorithm(
+                fnGetEvaluator, fnCreateSlots, selector.mutate, fnShow, max_age,
+                children=self.children, fnGetBatchFitness=fnGetBatchFitness, focus=self.focus,
+                acceptance=fnGetAcceptance(max_age), fnCredit=selector.credit, room_matching=self.room_matching,
+                two_phase=self.two_phase
+            )
+
+        if self.strategy == 'genetic':
+            scheduler = fnCreateGenetic(fnCreate, fnDisplay)
+        elif self.strategy == 'island':
+            # Islands report to the parent, which displays the global best
+            scheduler = island.IslandModel(
+                lambda fnCreateIsland: fnCreateGenetic(fnCreateIsland, lambda schedule: None),
+                fnCreate, fnDisplay,
+                islands=self.islands, migration_interval=self.migration_interval
+            )
+        elif self.strategy == 'population':
+            scheduler = population.PopulationAlgorithm(
+                fnGetBatchFitness, fnCreate, selector.mutate, fnDisplay,
+                population_size=self.population_size, cache=fitness_cache
+            )
+        elif self.strategy == 'tabu':
+            scheduler = tabu.TabuSearch(
+                fnGetEvaluator, fnCreate, selector.mutate, fnDisplay,
+                tenure=self.tabu_tenure, neighbourhood_size=self.neighbourhood_size, focus=self.focus,
+                fnCredit=selector.credit, room_matching=self.room_matching, two_phase=self.two_phase
+            )
+        elif self.strategy == 'lns':
+            scheduler = lns.LargeNeighbourhoodSearch(
+                fnGetEvaluator, fnCreate, fnDisplay, destroy_size=self.destroy_size, focus=self.focus,
+                two_phase=self.two_phase
+            )
+        else:
+            raise ValueError(f"Unknown scheduling strategy '{self.strategy}'")
+        scheduler.configure_stopping(self.stagnation_time, self.stagnation_evaluations, self.restarts, self.restart_policy)
+
+        # No schedule of this timetable can beat the bound, so reaching it ends the search.
+        # Computing it counts against the time limit.
+        search_start = time.time()
+        optimal_fitness = bounds.get_optimal_fitness(sections, faculty_list, days_per_week, slots_per_day, group_count)
+        self.bound_stats = {'score': optimal_fitness.constraint_score, 'seconds': time.time() - search_start}
+        best = None
+        solved = False
+        if len(sections) <= self.exact_threshold:
+            # Small timetables are solved exactly, leaving the strategy the rest of the time if that is not proven in half of it
+            exact_solver = exact.ExactSolver(
+                sections, room_list, faculty_list, days_per_week, slots_per_day, group_count, fnDisplay,
+                representatives=presolved.representatives
+            )
+            best = exact_solver.get_best(optimal_fitness, (self.time_limit - (time.time() - search_start)) / 2)
+            solved = best is not None and (exact_solver.proven or not optimal_fitness > best.fitness)
+            print(f"Exact search: {exact_solver.nodes} nodes, {'optimal' if solved else 'not proven'}")
+            self.stop_reason = 'OPTIMAL'
+
+        if not solved:
+            improvement = scheduler.get_best(optimal_fitness, self.time_limit - (time.time() - search_start))
+            self.stop_reason = scheduler.stop_reason
+            self.phase_times = scheduler.phase_times
+            if self.two_phase and improvement.fitness.total_conflict > 0:
+                # Conflicts were left, so the score is from the first phase, which leaves it out
+                improvement = genetic.Schedule(improvement.slots, fnGetEvaluator(improvement.slots).fitness)
+            if best is None or improvement.fitness > best.fitness:
+                best = improvement
+
+        if self.room_matching:
+            # Second stage: the best rooms for the final times
+            slots = assign_rooms(best.slots.copy())
+            fitness = fnGetEvaluator(slots).fitness
+            print(f"Room matching: {best.fitness.room_conflict} -> {fitness.room_conflict} room conflicts")
+            if fitness > best.fitness:
+                best = genetic.Schedule(slots, fitness)
+
+        if self.polish_time > 0:
+            # Steepest descent from the best schedule, one section at a time
+            polish_start = time.time()
+            evaluator = fnGetEvaluator(best.slots.copy())
+            moves, local_optimum = polish.polish(evaluator, self.polish_time, self.polish_strategy, movable)
+            self.polish_stats = {'moves': moves, 'local_optimum': local_optimum, 'seconds': time.time() - polish_start}
+            print(
+                f"Polishing: {moves} moves in {self.polish_stats['seconds']:.2f}s, score {best.fitness.constraint_score:.4f} -> "
+                f"{evaluator.fitness.constraint_score:.4f}, {'local optimum' if local_optimum else 'time limit'}"
+            )
+            if evaluator.fitness > best.fitness:
+                best = genetic.Schedule(evaluator.slots, evaluator.fitness)
+
+        print(f"Stopped: {self.stop_reason}")
+        print(f"Score bound: {self.bound_stats['score']:.4f}, computed in {self.bound_stats['seconds']:.2f}s")
+        if self.phase_times is not None:
+            print(f"Search phases: {self.phase_times[0]:.2f}s removing conflicts, {self.phase_times[1]:.2f}s raising the score")
+        # Filled in this process only: the island strategy adapts its operators and caches in the workers
+        self.operator_stats = selector.get_stats()
+        for name, stats in self.operator_stats.items():
+            print(
+                f"Operator {name}: {stats['uses']} uses, {stats['success_rate']:.2%} improving, "
+                f"mean gain {stats['mean_gain']:.2f}, probability {stats['probability']:.2f}"
+            )
+        if fitness_cache is not None:
+            self.cache_stats = {'hits': fitness_cache.hits, 'misses': fitness_cache.misses, 'hit_rate': fitness_cache.hit_rate}
+            print(f"Fitness cache: {fitness_cache.hits} hits, {fitness_cache.misses} misses, {fitness_cache.hit_rate:.2%} hit rate")
 
         print(best.fitness)
 
@@ -1,4 +1,5 @@
 class Section:
+    __slots__ = ('id', 'faculty', 'course', 'group', 'duration', 'domain')
 
     def __init__(self, id, faculty, course, group, duration):
         self.id = id
@@ -6,6 +7,7 @@ class Section:
         self.course = course
         self.group = group
         self.duration = duration
+        self.domain = None    # Feasible starts and rooms, built at load time
         # self.seats_required = group.group_size
 
 
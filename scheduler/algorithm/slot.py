@@ -1,4 +1,5 @@
 class Slot:
+    __slots__ = ('datetime', 'room', 'section')
 
     def __init__(self, datetime, room, section):
         self.datetime = datetime
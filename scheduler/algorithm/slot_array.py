@@ -0,0 +1,46 @@
+from array import array
+
+from .date_time_slot import DateTimeSlot
+from .slot import Slot
+
+
+class SlotArray:
+    """Compact schedule encoding used by the solver.
+
+    Stores the day, start time and room index of every section in parallel
+    `array('h')`s. The sections and room list are shared by every candidate
+    of a run, so a copy only costs a few bytes per section.
+    """
+
+    def __init__(self, sections, room_list):
+        self.sections = sections
+        self.room_list = room_list
+        self.days = array('h', [0]) * len(sections)
+        self.times = array('h', [0]) * len(sections)
+        self.rooms = array('h', [0]) * len(sections)
+
+    def __len__(self):
+        return len(self.sections)
+
+    def __getitem__(self, index):
+        """Return the (day, time, room index) placement of a section"""
+        return self.days[index], self.times[index], self.rooms[index]
+
+    def __setitem__(self, index, placement):
+        self.days[index], self.times[index], self.rooms[index] = placement
+
+    def copy(self):
+        slots = SlotArray.__new__(SlotArray)
+        slots.sections = self.sections
+        slots.room_list = self.room_list
+        slots.days = self.days[:]
+        slots.times = self.times[:]
+        slots.rooms = self.rooms[:]
+        return slots
+
+    def to_slots(self):
+        """Convert back to a list of Slot objects"""
+        return [
+            Slot(DateTimeSlot(day, time), self.room_list[room], section)
+            for section, day, time, room in zip(self.sections, self.days, self.times, self.rooms)
+        ]
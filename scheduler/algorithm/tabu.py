@@ -0,0 +1,86 @@
+import heapq
+import random
+
+from .genetic import Schedule, Solver
+
+
+class TabuSearch(Solver):
+    """Tabu search over a sampled neighbourhood of the current schedule.
+
+    Every step scores `neighbourhood_size` candidate moves incrementally and
+    applies the best one, even if it is worse than the current schedule.
+    A section may not return to a (day, time, room) it left for `tenure` to
+    2 * `tenure` steps, unless doing so gives a new best schedule.
+    """
+
+    def __init__(self, fnGetEvaluator, fnCreate, fnNeighbour, fnDisplay, tenure=10, neighbourhood_size=50, focus=0, fnCredit=None,
+                 room_matching=False, two_phase=False):
+        self.get_evaluator = fnGetEvaluator
+        self._create = fnCreate
+        self._neighbour = fnNeighbour
+        self.display = fnDisplay
+        self.tenure = tenure
+        self.neighbourhood_size = neighbourhood_size
+        self.focus = focus    # Probability of moving a conflicting or badly placed slot
+        self.credit = fnCredit    # Told the outcome of every scored move
+        self.room_matching = room_matching    # Whether moves only pick times, leaving the rooms to the evaluator
+        self.two_phase = two_phase
+        self.evaluator = None
+        self.tabu = {}    # (section index, day, time, room) -> first step it is allowed again
+        self.expiries = []    # Heap of (step, key) of the tabu entries, to drop them once allowed again
+
+    def _is_tabu(self, move, step):
+        return any(self.tabu.get((part.index, *part.new), 0) > step for part in move)
+
+    def _allowed(self, move, fitness, best_fitness, step):
+        """Aspiration: a tabu move is allowed when it beats the best schedule"""
+        return fitness > best_fitness or not self._is_tabu(move, step)
+
+    def _forbid(self, move, step):
+        """Make the placements the move leaves tabu, dropping the entries that have expired"""
+        while self.expiries and self.expiries[0][0] <= step:
+            expiry, key = heapq.heappop(self.expiries)
+            if self.tabu.get(key) == expiry:
+                del self.tabu[key]
+        for part in move:
+            key = (part.index, *part.old)
+            expiry = step + self.tenure + random.randrange(self.tenure + 1)
+            self.tabu[key] = expiry
+            heapq.heappush(self.expiries, (expiry, key))
+
+    def _get_improvement(self, start_time, time_limit, seed=None):
+        slots = seed.copy() if seed is not None else self._create()
+        self.evaluator = self.get_evaluator(slots)
+        self._start_first_phase()
+        self.tabu = {}
+        self.expiries = []
+        best = Schedule(slots.copy(), self.evaluator.fitness)
+        yield best
+
+        step = 0
+        while self._running(start_time, time_limit, self.neighbourhood_size):
+            step += 1
+            current = self.evaluator.fitness
+            chosen = chosen_fitness = None
+            for _ in range(self.neighbourhood_size):
+                move = self._neighbour(slots, self.evaluator.pick(self.focus))
+                if self.room_matching:
+                    move = self.evaluator.match_rooms(move)
+                fitness = self.evaluator.score(move)
+                if self.credit is not None:
+                    self.credit(move, current, fitness)
+                if not self._allowed(move, fitness, best.fitness, step):
+                    continue
+                if chosen_fitness is None or fitness > chosen_fitness:
+                    chosen, chosen_fitness = move, fitness
+            if chosen is None:
+                continue
+
+            self.evaluator.apply(chosen)
+            self._forbid(chosen, step)
+            if self._end_first_phase(chosen_fitness):
+                best = Schedule(slots.copy(), self.evaluator.fitness)
+                yield best
+            elif chosen_fitness > best.fitness:
+                best = Schedule(slots.copy(), chosen_fitness)
+                yield best
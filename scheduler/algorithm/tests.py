@@ -1,3 +1,10 @@
+import itertools
+import random
+import threading
+import time
+
+import billiard
+import numpy as np
 from django.test import TestCase
 from scheduler.organization.models import Organization
 from scheduler.models import DateTimeSlot as DB_DateTimeSlot
@@ -16,6 +23,12 @@ from .utils import (
     get_course_object,
     get_group_object,
     get_group_count_and_sections,
+    get_rooms,
+    get_faculties,
+    build_faculty_preferences,
+    build_section_domains,
+    get_related_sections,
+    Registry,
     save_slots_to_db
 )
 
@@ -25,7 +38,26 @@ from .course import Course
 from .faculty import Faculty
 from .group import Group
 from .section import Section
-from .slot import Slot
+from .slot_array import SlotArray
+from .fitness import Fitness, get_fitness
+from .genetic import GeneticAlgorithm, Schedule
+from .acceptance import AgeAcceptance, GreatDeluge, LateAcceptance, SimulatedAnnealing, ACCEPT, REJECT, RESTORE
+from .island import IslandModel, _encode, _run_island
+from .population import PopulationAlgorithm, group_crossover, uniform_crossover
+from .evaluator import FitnessEvaluator
+from .tabu import TabuSearch
+from .lns import LargeNeighbourhoodSearch
+from .operators import OperatorSelector
+from .exact import ExactSolver
+from .batch import BatchFitnessEvaluator
+from .cache import FitnessCache, ZobristTable
+from .feasibility import InfeasibleError, analyse
+from .bounds import get_optimal_fitness
+from .presolve import presolve
+from .polish import polish
+from .move import Move
+from .domain import Domain
+from .scheduler import assign_rooms, construct, create, kempe_chain, move_time, mutate, neighbour, swap
 
 class UtilityFunctionTests(TestCase):
     def setUp(self):
@@ -114,6 +146,79 @@ class UtilityFunctionTests(TestCase):
         self.assertEqual(section_obj.group.group_id, "G1")
 
 
+    def test_get_group_count_and_sections_interns_entities(self):
+        DB_Section.objects.create(
+            timetable=self.timetable,
+            faculty=self.faculty1,
+            course=self.course1,
+            group=self.group1,
+            duration=1
+        )
+        registry = Registry()
+        rooms = get_rooms(self.org.id, registry)
+        faculties = get_faculties(self.org.id, registry)
+        _, sections = get_group_count_and_sections(self.org.id, self.timetable.timetable_id, registry)
+
+        self.assertIs(sections[0].faculty, faculties[0])
+        self.assertIs(sections[1].faculty, faculties[0])
+        self.assertIs(sections[0].course, sections[1].course)
+        self.assertIs(sections[0].group, sections[1].group)
+        self.assertIs(sections[0].course.rooms[0], rooms[0])
+        self.assertEqual((rooms[0].index, faculties[0].index, sections[0].group.index), (0, 0, 0))
+
+    def test_interned_entities_match_plain_ones(self):
+        for interned, plain in (
+            (Room("R1", 30, 0), Room("R1", 30)),
+            (Faculty("F1", 1, [], 0), Faculty("F1", 1, [])),
+            (Group("G1", 30, 0), Group("G1", 30)),
+        ):
+            self.assertEqual(interned, plain)
+            self.assertEqual(hash(interned), hash(plain))
+            self.assertIn(plain, {interned})
+
+    def test_build_faculty_preferences(self):
+        registry = Registry()
+        faculties = get_faculties(self.org.id, registry)
+        _, sections = get_group_count_and_sections(self.org.id, self.timetable.timetable_id, registry)
+        build_faculty_preferences(faculties, sections, 5, 6)
+
+        self.assertEqual(faculties[0].preferred[1][1], 1)
+        self.assertEqual(sum(map(sum, faculties[0].preferred)), 1)
+        # One slot choice caps the two hours taught at one preferred hour
+        self.assertEqual(faculties[0].max_score, 1)
+
+    def test_build_section_domains(self):
+        small_room = DB_Room.objects.create(organization=self.org, room_id="R2", capacity=20)
+        self.course1.rooms.add(small_room)
+        registry = Registry()
+        rooms = get_rooms(self.org.id, registry)
+        _, sections = get_group_count_and_sections(self.org.id, self.timetable.timetable_id, registry)
+        build_section_domains(sections, rooms, 5, 6)
+
+        domain = sections[0].domain
+        # A two hour section can start anywhere up to the fifth slot
+        self.assertEqual(len(domain.starts), 5 * 5)
+        self.assertEqual(domain.preferred_starts, [(1, 1)])
+        # R2 cannot seat the group of 30
+        self.assertEqual(domain.rooms, [registry.rooms["R1"].index])
+
+        sections[0].duration = 7
+        with self.assertRaises(ValueError):
+            build_section_domains(sections, rooms, 5, 6)
+
+    def test_slot_array_to_slots(self):
+        _, sections = get_group_count_and_sections(self.org.id, self.timetable.timetable_id)
+        slots = SlotArray(sections, [get_room_object(self.room1)])
+        slots[0] = (1, 1, 0)
+        copy = slots.copy()
+        copy[0] = (2, 3, 0)
+
+        [slot] = slots.to_slots()
+        self.assertEqual(slot.datetime, DateTimeSlot(1, 1))
+        self.assertEqual(slot.room, Room("R1", 40))
+        self.assertIs(slot.section, sections[0])
+        self.assertEqual(copy[0], (2, 3, 0))
+
     def test_save_slots_to_db(self):
         section_obj = Section(
             id=self.section.id,
@@ -122,12 +227,9 @@ class UtilityFunctionTests(TestCase):
             group=get_group_object(self.group1),
             duration=2
         )
-        slot_obj = Slot(
-            section=section_obj,
-            room=get_room_object(self.room1),
-            datetime=DateTimeSlot(day=1, time=1)
-        )
-        db_slots = save_slots_to_db([slot_obj], self.org.id)
+        slots = SlotArray([section_obj], [get_room_object(self.room1)])
+        slots[0] = (1, 1, 0)
+        db_slots = save_slots_to_db(slots, self.org.id)
         self.assertEqual(len(db_slots), 1)
         self.assertTrue(DB_Slot.objects.filter(section=self.section).exists())
 
@@ -149,13 +251,10 @@ class UtilityFunctionTests(TestCase):
             group=get_group_object(self.group1),
             duration=2
         )
-        updated_slot = Slot(
-            section=section_obj,
-            room=get_room_object(new_room),
-            datetime=DateTimeSlot(day=2, time=2)
-        )
+        updated_slots = SlotArray([section_obj], [get_room_object(self.room1), get_room_object(new_room)])
+        updated_slots[0] = (2, 2, 1)
 
-        db_slots = save_slots_to_db([updated_slot], self.org.id)
+        db_slots = save_slots_to_db(updated_slots, self.org.id)
 
         # Assertions
         self.assertEqual(len(db_slots), 1)
@@ -174,13 +273,10 @@ class UtilityFunctionTests(TestCase):
             duration=2
         )
         nonexistent_room = Room(room_id="INVALID", capacity=0)
-        slot = Slot(
-            section=section_obj,
-            room=nonexistent_room,
-            datetime=DateTimeSlot(day=1, time=1)
-        )
+        slots = SlotArray([section_obj], [nonexistent_room])
+        slots[0] = (1, 1, 0)
         with self.assertRaises(ValueError):
-            save_slots_to_db([slot], self.org.id)
+            save_slots_to_db(slots, self.org.id)
 
     def test_save_slots_to_db_raises_on_missing_datetime(self):
         """Should raise ValueError if datetime slot does not exist"""
@@ -191,10 +287,1010 @@ class UtilityFunctionTests(TestCase):
             group=get_group_object(self.group1),
             duration=2
         )
-        slot = Slot(
-            section=section_obj,
-            room=get_room_object(self.room1),
-            datetime=DateTimeSlot(day=7, time=8)  # Not created in setup
+        slots = SlotArray([section_obj], [get_room_object(self.room1)])
+        slots[0] = (7, 8, 0)  # Not created in setup
+        with self.assertRaises(ValueError):
+            save_slots_to_db(slots, self.org.id)
+
+
+def placements(slots):
+    return [slots[index] for index in range(len(slots))]
+
+
+def build_problem(seed=0, days_per_week=5, slots_per_day=6, section_count=30):
+    """Build a random in-memory problem: (rooms, faculties, groups, sections)"""
+    rng = random.Random(seed)
+    rooms = [Room(f"R{i}", rng.choice([30, 40, 60]), i) for i in range(4)]
+    faculties = [
+        Faculty(
+            f"F{i}",
+            rng.randint(1, 3),
+            [DateTimeSlot(rng.randint(1, days_per_week), rng.randint(1, slots_per_day)) for _ in range(6)],
+            i
         )
+        for i in range(5)
+    ]
+    # Every room seats every group, as feasibility.analyse checks before the domains are built
+    groups = [Group(f"G{i}", rng.choice([20, 25, 30]), i) for i in range(4)]
+    courses = [Course(f"C{i}", rng.sample(rooms, rng.randint(0, 2))) for i in range(6)]
+    sections = [
+        Section(i, rng.choice(faculties), rng.choice(courses), rng.choice(groups), rng.randint(1, 3))
+        for i in range(section_count)
+    ]
+    build_faculty_preferences(faculties, sections, days_per_week, slots_per_day)
+    build_section_domains(sections, rooms, days_per_week, slots_per_day)
+    return rooms, faculties, groups, sections
+
+
+class FeasibilityTests(TestCase):
+    def setUp(self):
+        self.rooms = [Room("R0", 40, 0), Room("R1", 40, 1), Room("R2", 60, 2)]
+        self.faculties = [Faculty(f"F{i}", 1, [], i) for i in range(3)]
+        self.groups = [Group("G0", 30, 0), Group("G1", 50, 1)]
+        self.course = Course("C0", self.rooms[:2])
+        self.large_course = Course("C1", [self.rooms[2]])
+
+    def section(self, index, faculty, group, course, duration=2):
+        return Section(index, self.faculties[faculty], course, self.groups[group], duration)
+
+    def test_feasible_timetable_has_no_problems(self):
+        sections = [self.section(i, i % 3, 0, self.course) for i in range(10)]
+        self.assertEqual(analyse(sections, self.rooms, 5, 6), [])
+
+    def test_reports_overloads_and_unseated_groups(self):
+        sections = [self.section(i, 0, 0, self.course, duration=4) for i in range(8)]
+        sections.append(self.section(8, 1, 1, self.course))
+        sections.extend(self.section(9 + i, 2, 1, self.large_course, duration=3) for i in range(11))
+
+        self.assertEqual(analyse(sections, self.rooms, 5, 6), [
+            "No room of course C0 seats the 50 students of group G1",
+            "Faculty F0 needs 32 hours but the week has 30",
+            "Faculty F0 has 8 sections longer than half a day but the week has 5 days",
+            "Faculty F2 needs 33 hours but the week has 30",
+            "Group G0 needs 32 hours but the week has 30",
+            "Group G0 has 8 sections longer than half a day but the week has 5 days",
+            "Group G1 needs 35 hours but the week has 30",
+            "Sections limited to rooms R2 need 33 hours but those rooms offer 30",
+        ])
+
+    def test_domains_hold_the_rooms_analyse_checks(self):
+        seated = self.section(0, 0, 1, self.large_course)
+        self.assertEqual(analyse([seated], self.rooms, 5, 6), [])
+        build_section_domains([seated], self.rooms, 5, 6)
+        self.assertEqual(seated.domain.rooms, [2])
+
+        # No room of the course seats the group, which analyse reports and the domains never fall back from
+        unseated = self.section(1, 0, 1, self.course)
+        self.assertEqual(analyse([unseated], self.rooms, 5, 6), ["No room of course C0 seats the 50 students of group G1"])
         with self.assertRaises(ValueError):
-            save_slots_to_db([slot], self.org.id)
\ No newline at end of file
+            build_section_domains([unseated], self.rooms, 5, 6)
+
+
+class PresolveTests(TestCase):
+    def setUp(self):
+        self.rooms = [Room("R0", 40, 0), Room("R1", 40, 1)]
+        self.faculties = [Faculty(f"F{i}", 1, [], i) for i in range(2)]
+        self.groups = [Group(f"G{i}", 30, i) for i in range(2)]
+        self.course = Course("C0", self.rooms)
+
+    def section(self, index, faculty, group, duration, starts, rooms):
+        section = Section(index, self.faculties[faculty], self.course, self.groups[group], duration)
+        section.domain = Domain(starts, starts, rooms)
+        return section
+
+    def test_fixes_forced_sections_and_propagates(self):
+        sections = [
+            self.section(0, 0, 0, 2, [(1, 1)], [0]),
+            # Sharing the faculty, so only the start clear of section 0 is left and it is fixed too
+            self.section(1, 0, 1, 1, [(1, 2), (1, 3)], [1]),
+            # Its only room is taken by section 0 at (1, 1)
+            self.section(2, 1, 1, 1, [(1, 1), (1, 4)], [0]),
+            self.section(3, 1, 1, 1, [(1, 4), (1, 5)], [0, 1]),
+            self.section(4, 1, 1, 1, [(1, 4), (1, 5)], [0, 1]),
+        ]
+        result = presolve(sections)
+
+        self.assertEqual(result.fixed, {0, 1, 2})
+        self.assertEqual(sections[1].domain.starts, [(1, 3)])
+        self.assertEqual(sections[2].domain.starts, [(1, 4)])
+        self.assertEqual(sections[3].domain.starts, [(1, 5)])
+        self.assertEqual(result.removed_starts, 4)
+        self.assertEqual(result.representatives, [0, 1, 2, 2, 2])
+        self.assertEqual(result.movable(), [3, 4])
+
+    def test_raises_when_fixed_sections_clash(self):
+        sections = [self.section(0, 0, 0, 1, [(1, 1)], [0]), self.section(1, 1, 0, 1, [(1, 1)], [1])]
+        with self.assertRaises(InfeasibleError):
+            presolve(sections)
+
+    def test_moves_respect_presolved_domains(self):
+        random.seed(10)
+        rooms, faculties, groups, sections = build_problem(seed=10, section_count=30)
+        for index in range(3):
+            domain = sections[index].domain
+            start = (index + 1, 1)
+            sections[index].domain = Domain([start], [start], domain.rooms[:1])
+        result = presolve(sections)
+        self.assertEqual(result.fixed, {0, 1, 2})
+        self.assertGreater(result.removed_starts, 0)
+
+        related = [
+            [other for other in others if other not in result.fixed]
+            for others in get_related_sections(sections)
+        ]
+        selector = OperatorSelector({
+            'time': move_time,
+            'swap': lambda slots, index=None: swap(slots, related, index),
+            'kempe': lambda slots, index=None: kempe_chain(slots, related, index)
+        }, indices=result.movable())
+        slots = create(sections, rooms)
+        evaluator = FitnessEvaluator(slots, 5, 6, faculties, len(groups), fixed=result.fixed)
+        fixed_placements = [slots[index] for index in range(3)]
+        for _ in range(500):
+            move = selector.mutate(slots, evaluator.pick(0.9))
+            for part in move:
+                self.assertNotIn(part.index, result.fixed)
+                self.assertIn(part.new[:2], sections[part.index].domain.starts)
+            evaluator.apply(move)
+        self.assertEqual([slots[index] for index in range(3)], fixed_placements)
+
+
+class ConstructTests(TestCase):
+    def test_construct_places_sections_without_clashes(self):
+        random.seed(0)
+        rooms, faculties, groups, sections = build_problem(seed=3, section_count=30)
+        slots = construct(sections, rooms, 5, 6)
+
+        for index, section in enumerate(sections):
+            day, time, room = slots[index]
+            self.assertIn((day, time), section.domain.starts)
+            self.assertIn(room, section.domain.rooms)
+        self.assertEqual(get_fitness(slots, 5, faculties, len(groups)).total_conflict, 0)
+
+
+class FitnessEvaluatorTests(TestCase):
+    def setUp(self):
+        random.seed(1)
+        self.days_per_week, self.slots_per_day = 5, 6
+        self.rooms, self.faculties, self.groups, self.sections = build_problem()
+        self.slots = create(self.sections, self.rooms)
+
+    def full_fitness(self, slots):
+        return get_fitness(slots, self.days_per_week, self.faculties, len(self.groups))
+
+    def assertSameFitness(self, actual, expected):
+        self.assertEqual(str(actual), str(expected))
+
+    def test_initial_fitness_matches_get_fitness(self):
+        evaluator = FitnessEvaluator(self.slots, self.days_per_week, self.slots_per_day, self.faculties, len(self.groups))
+        self.assertSameFitness(evaluator.fitness, self.full_fitness(self.slots))
+
+    def test_moves_and_rollbacks_match_get_fitness(self):
+        evaluator = FitnessEvaluator(self.slots, self.days_per_week, self.slots_per_day, self.faculties, len(self.groups))
+        for _ in range(200):
+            move = mutate(self.slots)
+            score = evaluator.score(move)
+            self.assertSameFitness(evaluator.fitness, self.full_fitness(self.slots))
+            evaluator.apply(move)
+            self.assertSameFitness(evaluator.fitness, self.full_fitness(self.slots))
+            self.assertSameFitness(score, evaluator.fitness)
+            if random.random() < 0.3:
+                evaluator.undo(move)
+                self.assertSameFitness(evaluator.fitness, self.full_fitness(self.slots))
+
+
+    def test_tracks_conflicted_and_unpreferred_slots(self):
+        evaluator = FitnessEvaluator(self.slots, self.days_per_week, self.slots_per_day, self.faculties, len(self.groups))
+        for _ in range(100):
+            evaluator.apply(mutate(self.slots))
+
+            occupants = {}
+            unpreferred = set()
+            for index, section in enumerate(self.sections):
+                day, time, room = self.slots[index]
+                for hour in range(section.duration):
+                    for key in (('room', room), ('faculty', section.faculty.index), ('group', section.group.index)):
+                        occupants.setdefault((day, time + hour) + key, []).append(index)
+                    if not section.faculty.preferred[day][time + hour]:
+                        unpreferred.add(index)
+            conflicted = {index for indices in occupants.values() if len(indices) > 1 for index in indices}
+
+            self.assertEqual(set(evaluator.conflicted), conflicted)
+            self.assertEqual(set(evaluator.unpreferred), unpreferred)
+
+    def test_hard_only_counts_conflicts_alone(self):
+        evaluator = FitnessEvaluator(self.slots, self.days_per_week, self.slots_per_day, self.faculties, len(self.groups), hard_only=True)
+        for _ in range(100):
+            evaluator.apply(mutate(self.slots))
+            full = self.full_fitness(self.slots)
+            fitness = evaluator.fitness
+            self.assertEqual((fitness.room_conflict, fitness.faculty_conflict, fitness.group_conflict),
+                             (full.room_conflict, full.faculty_conflict, full.group_conflict))
+            self.assertEqual(fitness.constraint_score, 0)
+
+        evaluator.set_hard_only(False)
+        self.assertSameFitness(evaluator.fitness, self.full_fitness(self.slots))
+
+
+class FitnessCacheTests(TestCase):
+    def setUp(self):
+        random.seed(1)
+        self.days_per_week, self.slots_per_day = 5, 6
+        self.rooms, self.faculties, self.groups, self.sections = build_problem()
+        self.zobrist = ZobristTable(len(self.sections), self.days_per_week, self.slots_per_day, len(self.rooms))
+
+    def test_cached_scores_and_hashes_stay_exact(self):
+        slots = create(self.sections, self.rooms)
+        cache = FitnessCache(self.zobrist)
+        evaluator = FitnessEvaluator(
+            slots, self.days_per_week, self.slots_per_day, self.faculties, len(self.groups), cache=cache
+        )
+        moves = [mutate(slots) for _ in range(20)]
+        for _ in range(200):
+            move = random.choice(moves)
+            if move.old != slots[move.index]:
+                continue
+            fitness = evaluator.score(move)
+            evaluator.apply(move)
+            self.assertEqual(evaluator.hash, self.zobrist.hash(slots))
+            self.assertEqual(str(fitness), str(get_fitness(slots, self.days_per_week, self.faculties, len(self.groups))))
+            evaluator.undo(move)
+        self.assertGreater(cache.hits, 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = FitnessCache(self.zobrist, capacity=2)
+        cache.put(1, Fitness(1, 0, 0, 0, 0))
+        cache.put(2, Fitness(2, 0, 0, 0, 0))
+        cache.get(1)
+        cache.put(3, Fitness(3, 0, 0, 0, 0))
+
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(1))
+        self.assertIsNotNone(cache.get(3))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+
+class BatchFitnessEvaluatorTests(TestCase):
+    def test_batch_matches_get_fitness(self):
+        random.seed(3)
+        days_per_week, slots_per_day = 5, 6
+        rooms, faculties, groups, sections = build_problem(seed=3)
+        candidates = [create(sections, rooms) for _ in range(8)]
+
+        evaluator = BatchFitnessEvaluator(sections, days_per_week, slots_per_day, faculties, len(rooms), len(groups))
+        for slots, fitness in zip(candidates, evaluator.evaluate(candidates)):
+            self.assertEqual(str(fitness), str(get_fitness(slots, days_per_week, faculties, len(groups))))
+
+
+class GeneticAlgorithmTests(TestCase):
+    def create_algorithm(self, sections, rooms, faculties, groups, fnDisplay):
+        return GeneticAlgorithm(
+            lambda slots: FitnessEvaluator(slots, 5, 6, faculties, len(groups)),
+            lambda: create(sections, rooms),
+            mutate,
+            fnDisplay,
+            max_age=20
+        )
+
+    def test_best_snapshot_is_not_changed_by_later_moves(self):
+        random.seed(2)
+        rooms, faculties, groups, sections = build_problem(seed=2)
+        snapshots = []
+        algorithm = self.create_algorithm(
+            sections, rooms, faculties, groups, lambda schedule: snapshots.append((schedule, placements(schedule.slots)))
+        )
+        algorithm.get_best(Fitness(0, 0, 0, 1, 1), 0.5)
+
+        self.assertGreater(len(snapshots), 1)
+        for schedule, placed in snapshots:
+            self.assertEqual(placements(schedule.slots), placed)
+
+    def test_revert_returns_to_the_best_schedule(self):
+        random.seed(2)
+        rooms, faculties, groups, sections = build_problem(seed=2)
+        algorithm = self.create_algorithm(sections, rooms, faculties, groups, lambda schedule: None)
+        # Undone move by move from the journal, then restored from the snapshot once the journal is dropped
+        for move_count in (5, 3 * len(sections)):
+            parent = algorithm.generate_parent()
+            best = algorithm._snapshot(parent)
+            for _ in range(move_count):
+                move = mutate(parent.slots)
+                parent = algorithm._accept(parent, move, algorithm.evaluator.score(move))
+            self.assertEqual(algorithm.journal is None, move_count > len(sections))
+
+            parent = algorithm._revert(parent, best)
+            self.assertEqual(placements(parent.slots), placements(best.slots))
+            self.assertEqual(str(algorithm.evaluator.fitness), str(best.fitness))
+            self.assertEqual(algorithm.journal, [])
+
+    def test_two_phase_scores_only_conflict_free_schedules(self):
+        random.seed(2)
+        days_per_week, slots_per_day = 5, 6
+        rooms, faculties, groups, sections = build_problem(seed=2, section_count=15)
+        improvements = []
+
+        algorithm = GeneticAlgorithm(
+            lambda slots: FitnessEvaluator(slots, days_per_week, slots_per_day, faculties, len(groups)),
+            lambda: create(sections, rooms),
+            mutate,
+            improvements.append,
+            max_age=20,
+            two_phase=True
+        )
+        best = algorithm.get_best(Fitness(0, 0, 0, 1, 1), 0.5)
+
+        self.assertGreater(improvements[0].fitness.total_conflict, 0)
+        self.assertEqual(best.fitness.total_conflict, 0)
+        for improvement in improvements:
+            full = get_fitness(improvement.slots, days_per_week, faculties, len(groups))
+            self.assertEqual(improvement.fitness.total_conflict, full.total_conflict)
+            if improvement.fitness.total_conflict > 0:
+                self.assertEqual(improvement.fitness.constraint_score, 0)
+            else:
+                self.assertEqual(str(improvement.fitness), str(full))
+        conflict_seconds, score_seconds = algorithm.phase_times
+        self.assertGreater(conflict_seconds, 0)
+        self.assertGreater(score_seconds, 0)
+
+
+class StoppingTests(TestCase):
+    def _create_algorithm(self, section_count):
+        days_per_week, slots_per_day = 5, 6
+        rooms, faculties, groups, sections = build_problem(seed=8, section_count=section_count)
+        return GeneticAlgorithm(
+            lambda slots: FitnessEvaluator(slots, days_per_week, slots_per_day, faculties, len(groups)),
+            lambda: construct(sections, rooms, days_per_week, slots_per_day),
+            mutate,
+            lambda schedule: None,
+            max_age=20
+        )
+
+    def test_stops_on_plateau_without_conflicts(self):
+        random.seed(8)
+        algorithm = self._create_algorithm(section_count=10)
+        algorithm.configure_stopping(stagnation_evaluations=500)
+        best = algorithm.get_best(Fitness(0, 0, 0, 1, 1), 10)
+
+        self.assertEqual(best.fitness.total_conflict, 0)
+        self.assertIn(algorithm.stop_reason, ('PLATEAU', 'OPTIMAL'))
+
+    def test_restarts_on_plateau_with_conflicts(self):
+        random.seed(8)
+        algorithm = self._create_algorithm(section_count=200)
+        algorithm.configure_stopping(stagnation_evaluations=200, restarts=2, restart_policy='best')
+        best = algorithm.get_best(Fitness(0, 0, 0, 1, 1), 1)
+
+        self.assertGreater(best.fitness.total_conflict, 0)
+        self.assertEqual(algorithm.restarts_left, 0)
+        # Out of restarts, a search with conflicts runs until the time limit
+        self.assertEqual(algorithm.stop_reason, 'TIME_LIMIT')
+
+    def test_best_restarts_start_from_the_best_schedule(self):
+        random.seed(8)
+        algorithm = self._create_algorithm(section_count=200)
+        create = algorithm._create
+        created = []
+        algorithm._create = lambda: created.append(True) or create()
+        seeds = []
+        get_improvement = algorithm._get_improvement
+
+        def record_seed(start_time, time_limit, seed=None):
+            seeds.append(seed)
+            return get_improvement(start_time, time_limit, seed)
+
+        algorithm._get_improvement = record_seed
+        algorithm.configure_stopping(stagnation_evaluations=200, restarts=2, restart_policy='best')
+        algorithm.get_best(Fitness(0, 0, 0, 1, 1), 1)
+
+        # Only the first search creates a schedule, the restarts continue from the best one
+        self.assertEqual(len(created), 1)
+        self.assertEqual(len(seeds), 3)
+        self.assertIsNone(seeds[0])
+        self.assertTrue(all(seed is not None for seed in seeds[1:]))
+
+
+class MoveOperatorTests(TestCase):
+    def setUp(self):
+        random.seed(9)
+        self.days_per_week, self.slots_per_day = 5, 6
+        self.rooms, self.faculties, self.groups, self.sections = build_problem(seed=9, section_count=40)
+        for section in self.sections:
+            section.duration = 1
+        build_section_domains(self.sections, self.rooms, self.days_per_week, self.slots_per_day)
+        self.related = get_related_sections(self.sections)
+
+    def test_swap_exchanges_related_sections(self):
+        slots = create(self.sections, self.rooms)
+        for _ in range(100):
+            move = swap(slots, self.related)
+            first, second = move
+            self.assertIn(second.index, self.related[first.index])
+            self.assertEqual(first.new[:2], second.old[:2])
+            self.assertEqual(second.new[:2], first.old[:2])
+
+    def test_kempe_chain_creates_no_faculty_or_group_clash(self):
+        slots = construct(self.sections, self.rooms, self.days_per_week, self.slots_per_day)
+        evaluator = FitnessEvaluator(slots, self.days_per_week, self.slots_per_day, self.faculties, len(self.groups))
+        self.assertEqual(evaluator.faculty_conflict + evaluator.group_conflict, 0)
+
+        for _ in range(200):
+            move = kempe_chain(slots, self.related)
+            if move is None:
+                continue
+            before = str(evaluator.fitness)
+            self.assertEqual(str(evaluator.score(move)), str(get_fitness(self._applied(slots, move), self.days_per_week, self.faculties, len(self.groups))))
+            self.assertEqual(str(evaluator.fitness), before)
+            evaluator.apply(move)
+            self.assertEqual(evaluator.faculty_conflict + evaluator.group_conflict, 0)
+
+    @staticmethod
+    def _applied(slots, move):
+        copy = slots.copy()
+        for part in move:
+            copy[part.index] = part.new
+        return copy
+
+
+class RoomMatchingTests(TestCase):
+    def setUp(self):
+        random.seed(11)
+        self.days_per_week, self.slots_per_day = 5, 6
+        self.rooms, self.faculties, self.groups, self.sections = build_problem(seed=11, section_count=40)
+
+    def full_fitness(self, slots):
+        return get_fitness(slots, self.days_per_week, self.faculties, len(self.groups))
+
+    def test_assign_rooms_clears_room_clashes_when_rooms_suffice(self):
+        for section in self.sections:
+            section.duration = 1
+            section.domain.rooms = list(range(len(self.rooms)))
+        slots = construct(self.sections, self.rooms, self.days_per_week, self.slots_per_day)
+        for index in range(len(slots)):
+            slots[index] = slots[index][:2] + (random.randrange(len(self.rooms)),)
+        times = [slots[index][:2] for index in range(len(slots))]
+        self.assertGreater(self.full_fitness(slots).room_conflict, 0)
+
+        assign_rooms(slots)
+        self.assertEqual([slots[index][:2] for index in range(len(slots))], times)
+        self.assertEqual(self.full_fitness(slots).room_conflict, 0)
+
+    def test_matched_moves_score_exactly_and_avoid_room_clashes(self):
+        slots = construct(self.sections, self.rooms, self.days_per_week, self.slots_per_day)
+        evaluator = FitnessEvaluator(slots, self.days_per_week, self.slots_per_day, self.faculties, len(self.groups))
+        for _ in range(200):
+            move = move_time(slots)
+            before = str(evaluator.fitness)
+            matched = evaluator.match_rooms(move)
+            self.assertEqual(str(evaluator.fitness), before)
+
+            fitness = evaluator.score(matched)
+            self.assertLessEqual(fitness.room_conflict, evaluator.score(move).room_conflict)
+            evaluator.apply(matched)
+            self.assertEqual(str(fitness), str(self.full_fitness(slots)))
+            for part in matched:
+                self.assertIn(slots.rooms[part.index], self.sections[part.index].domain.rooms)
+
+
+class OperatorSelectorTests(TestCase):
+    def test_adapts_to_improving_operator(self):
+        random.seed(10)
+        rooms, faculties, groups, sections = build_problem(seed=10)
+        slots = create(sections, rooms)
+        selector = OperatorSelector({
+            'plain': lambda slots, index=None: mutate(slots, index),
+            'good': lambda slots, index=None: mutate(slots, index),
+            'never': lambda slots, index=None: None,
+        })
+        worse, better = Fitness(1, 0, 0, 0, 0), Fitness(0, 0, 0, 0, 0)
+        for _ in range(1000):
+            move = selector.mutate(slots)
+            selector.credit(move, worse, better if move.operator == 'good' else worse)
+
+        stats = selector.get_stats()
+        self.assertEqual(stats['never']['uses'], 0)
+        self.assertEqual(stats['good']['success_rate'], 1)
+        self.assertEqual(stats['good']['mean_gain'], 100)
+        self.assertEqual(stats['plain']['success_rate'], 0)
+        self.assertGreater(stats['good']['probability'], 0.5)
+        self.assertLess(stats['never']['probability'], 1 / 3)
+        self.assertAlmostEqual(sum(stats[name]['probability'] for name in stats), 1)
+
+
+class TabuSearchTests(TestCase):
+    def test_neighbour_moves_stay_in_domains(self):
+        random.seed(6)
+        rooms, faculties, groups, sections = build_problem(seed=6)
+        related = get_related_sections(sections)
+        slots = create(sections, rooms)
+        for _ in range(200):
+            for move in neighbour(slots, related):
+                day, time, room = move.new
+                self.assertIn((day, time), sections[move.index].domain.starts)
+                self.assertEqual(move.old, slots[move.index])
+                slots[move.index] = move.new
+
+    def test_reversing_moves_are_tabu_until_they_expire(self):
+        random.seed(6)
+        search = TabuSearch(None, None, None, None, tenure=3)
+        move = Move(0, (1, 1, 0), (1, 2, 0))
+        search._forbid(move, 1)
+        back = move.inverse()
+        worse, better = Fitness(1, 0, 0, 0, 0), Fitness(0, 0, 0, 0, 0)
+
+        self.assertTrue(search._is_tabu(back, 2))
+        self.assertFalse(search._allowed(back, worse, better, 2))
+        # Aspiration: a tabu move giving a new best schedule is allowed
+        self.assertTrue(search._allowed(back, better, worse, 2))
+        # Only the placement left is tabu, not other rooms at the same time
+        self.assertFalse(search._is_tabu(Move(0, (1, 2, 0), (1, 1, 1)), 2))
+        # Allowed again after at most 2 * tenure steps
+        self.assertFalse(search._is_tabu(back, 1 + 2 * 3))
+
+    def test_expired_entries_are_dropped(self):
+        random.seed(6)
+        search = TabuSearch(None, None, None, None, tenure=3)
+        for step in range(1, 1000):
+            search._forbid(Move(step % 50, (1, 1, 0), (1, 2, 0)), step)
+            self.assertLessEqual(len(search.tabu), 2 * 3 + 1)
+
+
+class LargeNeighbourhoodSearchTests(TestCase):
+    def test_lift_and_place_restore_the_fitness(self):
+        random.seed(8)
+        rooms, faculties, groups, sections = build_problem(seed=8)
+        slots = create(sections, rooms)
+        evaluator = FitnessEvaluator(slots, 5, 6, faculties, len(groups))
+        before = str(evaluator.fitness)
+        placements = [slots[index] for index in range(4)]
+        for index in range(4):
+            evaluator.lift(index)
+        for index, placement in enumerate(placements):
+            evaluator.place(index, placement)
+        self.assertEqual(str(evaluator.fitness), before)
+
+    def test_repairs_stay_in_domains_and_are_no_worse(self):
+        random.seed(8)
+        rooms, faculties, groups, sections = build_problem(seed=8, section_count=60)
+        search = LargeNeighbourhoodSearch(
+            lambda slots: FitnessEvaluator(slots, 5, 6, faculties, len(groups)),
+            None,
+            None,
+            destroy_size=4,
+            repair_nodes=200,
+            focus=0.5
+        )
+        slots = create(sections, rooms)
+        search._start(slots)
+        repairs = 0
+        for _ in range(100):
+            before = search.evaluator.fitness
+            placed = placements(slots)
+            indices = search._destroy(slots)
+            self.assertLessEqual(len(indices), 4)
+            move, fitness = search._repair(slots, indices)
+
+            # The evaluator is left as it was
+            self.assertEqual(placements(slots), placed)
+            self.assertEqual(str(search.evaluator.fitness), str(before))
+            self.assertFalse(before > fitness)
+            if move is None:
+                continue
+            repairs += 1
+            for part in move:
+                self.assertIn(part.index, indices)
+                self.assertIn(part.new[:2], sections[part.index].domain.starts)
+                self.assertIn(part.new[2], sections[part.index].domain.rooms)
+            search.evaluator.apply(move)
+            self.assertEqual(str(search.evaluator.fitness), str(fitness))
+        self.assertGreater(repairs, 0)
+
+    def test_repairs_match_exhaustive_search(self):
+        for priority in (2, -2):
+            for seed in range(60):
+                random.seed(seed)
+                rooms, faculties, groups, sections = build_problem(seed=seed, days_per_week=2, slots_per_day=3, section_count=5)
+                for faculty in faculties:
+                    faculty.priority = priority
+                build_faculty_preferences(faculties, sections, 2, 3)
+                search = LargeNeighbourhoodSearch(
+                    lambda slots: FitnessEvaluator(slots, 2, 3, faculties, len(groups)),
+                    None,
+                    None,
+                    destroy_size=3,
+                    repair_nodes=float('inf')
+                )
+                slots = create(sections, rooms)
+                search._start(slots)
+                indices = search._destroy(slots)
+                move, fitness = search._repair(slots, indices)
+
+                # Every combination of placements of the lifted sections
+                old = [slots[index] for index in indices]
+                for index in indices:
+                    search.evaluator.lift(index)
+                best = None
+                options = [
+                    [(day, time, room) for day, time in sections[index].domain.starts for room in sections[index].domain.rooms]
+                    for index in indices
+                ]
+                for combination in itertools.product(*options):
+                    for index, placement in zip(indices, combination):
+                        search.evaluator.place(index, placement)
+                    if best is None or search.evaluator.fitness > best:
+                        best = search.evaluator.fitness
+                    for index in indices:
+                        search.evaluator.lift(index)
+                for index, placement in zip(indices, old):
+                    search.evaluator.place(index, placement)
+                self.assertEqual(
+                    (fitness.total_conflict, round(fitness.constraint_score, 6)),
+                    (best.total_conflict, round(best.constraint_score, 6))
+                )
+
+
+class PolishTests(TestCase):
+    def setUp(self):
+        random.seed(9)
+        self.days_per_week, self.slots_per_day = 5, 6
+        self.rooms, self.faculties, self.groups, self.sections = build_problem(seed=9, section_count=20)
+
+    def test_stops_at_a_local_optimum(self):
+        for strategy in ('first', 'best'):
+            slots = create(self.sections, self.rooms)
+            evaluator = FitnessEvaluator(slots, self.days_per_week, self.slots_per_day, self.faculties, len(self.groups))
+            before = evaluator.fitness
+            moves, local_optimum = polish(evaluator, 10, strategy)
+
+            self.assertTrue(local_optimum)
+            self.assertGreater(moves, 0)
+            self.assertGreater(evaluator.fitness, before)
+            self.assertEqual(
+                str(evaluator.fitness),
+                str(get_fitness(slots, self.days_per_week, self.faculties, len(self.groups)))
+            )
+            # No single move of a section improves the schedule any more
+            for index, section in enumerate(self.sections):
+                for day, time in section.domain.starts:
+                    for room in section.domain.rooms:
+                        self.assertFalse(evaluator.score(Move(index, slots[index], (day, time, room))) > evaluator.fitness)
+
+    def test_rejects_unknown_strategy(self):
+        slots = create(self.sections, self.rooms)
+        evaluator = FitnessEvaluator(slots, self.days_per_week, self.slots_per_day, self.faculties, len(self.groups))
+        with self.assertRaises(ValueError):
+            polish(evaluator, 1, 'random')
+
+
+class ExactSolverTests(TestCase):
+    def test_finds_the_best_schedule(self):
+        days_per_week, slots_per_day = 2, 3
+        rooms, faculties, groups, sections = build_problem(seed=7, days_per_week=days_per_week, slots_per_day=slots_per_day, section_count=4)
+        self.assertFindsTheBest(rooms, faculties, groups, sections, days_per_week, slots_per_day)
+
+    def test_faculties_without_positive_priority(self):
+        days_per_week, slots_per_day = 2, 3
+        rooms, faculties, groups, sections = build_problem(seed=7, days_per_week=days_per_week, slots_per_day=slots_per_day, section_count=4)
+        for faculty in faculties[::2]:
+            faculty.priority = 0
+        build_faculty_preferences(faculties, sections, days_per_week, slots_per_day)
+        self.assertFindsTheBest(rooms, faculties, groups, sections, days_per_week, slots_per_day)
+
+        for faculty in faculties:
+            faculty.priority = 0
+        build_faculty_preferences(faculties, sections, days_per_week, slots_per_day)
+        self.assertFindsTheBest(rooms, faculties, groups, sections, days_per_week, slots_per_day)
+
+        rooms, faculties, groups, sections = build_problem(seed=3, days_per_week=days_per_week, slots_per_day=slots_per_day, section_count=4)
+        for faculty in faculties[::2]:
+            faculty.priority = -2
+        build_faculty_preferences(faculties, sections, days_per_week, slots_per_day)
+        self.assertFindsTheBest(rooms, faculties, groups, sections, days_per_week, slots_per_day)
+
+    def assertFindsTheBest(self, rooms, faculties, groups, sections, days_per_week, slots_per_day):
+        solver = ExactSolver(sections, rooms, faculties, days_per_week, slots_per_day, len(groups), lambda schedule: None)
+        # Out of reach, so the search always runs to the end
+        best = solver.get_best(Fitness(0, 0, 0, 2, 2), 10)
+
+        self.assertTrue(solver.proven)
+        self.assertEqual(str(best.fitness), str(get_fitness(best.slots, days_per_week, faculties, len(groups))))
+
+        # Brute force over every combination of placements
+        slots = SlotArray(sections, rooms)
+        placements = [
+            [(day, time, room) for day, time in section.domain.starts for room in section.domain.rooms]
+            for section in sections
+        ]
+        for combination in itertools.product(*placements):
+            for index, placement in enumerate(combination):
+                slots[index] = placement
+            self.assertFalse(get_fitness(slots, days_per_week, faculties, len(groups)) > best.fitness)
+
+    def test_interchangeable_sections_keep_the_best_score(self):
+        rooms, faculties, groups, sections = build_problem(seed=8, days_per_week=2, section_count=6)
+        for section in sections[3:]:
+            section.faculty, section.course, section.group, section.duration = (
+                sections[0].faculty, sections[0].course, sections[0].group, sections[0].duration
+            )
+        build_section_domains(sections, rooms, 2, 6)
+        representatives = presolve(sections).representatives
+        self.assertEqual(representatives[3:], [0, 0, 0])
+
+        scores = []
+        for twins in (None, representatives):
+            solver = ExactSolver(sections, rooms, faculties, 2, 6, len(groups), lambda schedule: None, representatives=twins)
+            scores.append(solver.get_best(Fitness(0, 0, 0, 1, 1), 10).fitness.constraint_score)
+            self.assertTrue(solver.proven)
+        self.assertAlmostEqual(scores[0], scores[1])
+
+    def test_proves_infeasible_timetables(self):
+        rooms, faculties, groups, sections = build_problem(seed=7, days_per_week=1, slots_per_day=3, section_count=4)
+        for section in sections:
+            section.group = groups[0]
+            section.duration = 1
+        build_section_domains(sections, rooms, 1, 3)
+        solver = ExactSolver(sections, rooms, faculties, 1, 3, len(groups), lambda schedule: None)
+
+        self.assertIsNone(solver.get_best(Fitness(0, 0, 0, 1, 1), 10))
+        self.assertTrue(solver.proven)
+
+
+class OptimalFitnessTests(TestCase):
+    def test_no_schedule_beats_the_bound(self):
+        for seed in range(5):
+            rooms, faculties, groups, sections = build_problem(seed=seed, days_per_week=2, section_count=6)
+            bound = get_optimal_fitness(sections, faculties, 2, 6, len(groups))
+            solver = ExactSolver(sections, rooms, faculties, 2, 6, len(groups), lambda schedule: None)
+            best = solver.get_best(Fitness(0, 0, 0, 1, 1), 10)
+
+            self.assertTrue(solver.proven)
+            if best is not None:
+                self.assertLessEqual(best.fitness.constraint_score, bound.constraint_score + 1e-6)
+
+    def test_packing_falls_back_to_windows_once_the_work_runs_out(self):
+        looser = 0
+        for seed in range(5):
+            rooms, faculties, groups, sections = build_problem(seed=seed, days_per_week=2, section_count=6)
+            packed = get_optimal_fitness(sections, faculties, 2, 6, len(groups))
+            windows = get_optimal_fitness(sections, faculties, 2, 6, len(groups), max_work=0)
+
+            self.assertGreaterEqual(windows.constraint_score + 1e-6, packed.constraint_score)
+            looser += windows.constraint_score > packed.constraint_score + 1e-6
+        self.assertGreater(looser, 0)
+
+    def test_faculties_with_negative_priority(self):
+        for seed in range(4):
+            rooms, faculties, groups, sections = build_problem(seed=seed, days_per_week=2, slots_per_day=3, section_count=4)
+            for faculty in faculties[::2]:
+                faculty.priority = -2
+            build_faculty_preferences(faculties, sections, 2, 3)
+            bound = get_optimal_fitness(sections, faculties, 2, 3, len(groups))
+
+            # Brute force over every combination of placements
+            slots = SlotArray(sections, rooms)
+            placements = [
+                [(day, time, room) for day, time in section.domain.starts for room in section.domain.rooms]
+                for section in sections
+            ]
+            for combination in itertools.product(*placements):
+                for index, placement in enumerate(combination):
+                    slots[index] = placement
+                fitness = get_fitness(slots, 2, faculties, len(groups))
+                if fitness.total_conflict == 0:
+                    self.assertLessEqual(fitness.constraint_score, bound.constraint_score + 1e-6)
+
+    def test_search_stops_once_the_bound_is_reached(self):
+        random.seed(12)
+        rooms, faculties, groups, sections = build_problem(seed=12, section_count=1)
+        sections[0].duration = 1
+        build_section_domains(sections, rooms, 5, 6)
+        bound = get_optimal_fitness(sections, faculties, 5, 6, len(groups))
+        algorithm = GeneticAlgorithm(
+            lambda slots: FitnessEvaluator(slots, 5, 6, faculties, len(groups)),
+            lambda: create(sections, rooms),
+            mutate,
+            lambda schedule: None,
+            max_age=20
+        )
+        best = algorithm.get_best(bound, 10)
+
+        self.assertEqual(algorithm.stop_reason, 'OPTIMAL')
+        self.assertAlmostEqual(best.fitness.constraint_score, bound.constraint_score)
+
+
+class AcceptanceTests(TestCase):
+    def test_age_acceptance_keeps_bounded_history(self):
+        acceptance = AgeAcceptance(max_age=2, history_size=3)
+        acceptance.reset(Fitness(10, 0, 0, 0, 0))
+        for conflicts in range(9, 0, -1):
+            self.assertEqual(acceptance.decide(Fitness(conflicts + 1, 0, 0, 0, 0), Fitness(conflicts, 0, 0, 0, 0), Fitness(conflicts + 1, 0, 0, 0, 0)), ACCEPT)
+        self.assertEqual([fitness.total_conflict for fitness in acceptance.history], [3, 2, 1])
+
+        current = Fitness(1, 0, 0, 0, 0)
+        self.assertEqual(acceptance.decide(current, Fitness(5, 0, 0, 0, 0), current), REJECT)
+        self.assertIn(acceptance.decide(current, Fitness(5, 0, 0, 0, 0), current), (ACCEPT, RESTORE))
+
+    def test_late_acceptance_compares_with_ring_buffer(self):
+        acceptance = LateAcceptance(length=2)
+        acceptance.reset(Fitness(5, 0, 0, 0, 0))
+        current = Fitness(1, 0, 0, 0, 0)
+        # Worse than the current schedule but no worse than two steps ago
+        self.assertEqual(acceptance.decide(current, Fitness(4, 0, 0, 0, 0), current), ACCEPT)
+        self.assertEqual(acceptance.decide(current, Fitness(6, 0, 0, 0, 0), current), REJECT)
+        self.assertEqual(acceptance.decide(current, Fitness(4, 0, 0, 0, 0), current), ACCEPT)
+        self.assertEqual(len(acceptance.history), 2)
+
+    def test_annealing_accepts_worse_moves_while_hot(self):
+        random.seed(3)
+        current, worse, better = Fitness(1, 0, 0, 0, 0), Fitness(2, 0, 0, 0, 0), Fitness(0, 0, 0, 0, 0)
+        hot = SimulatedAnnealing(initial_temperature=1e9)
+        hot.reset(current)
+        self.assertEqual(hot.decide(current, worse, current), ACCEPT)
+
+        cold = SimulatedAnnealing(initial_temperature=1e-3, min_temperature=1e-3)
+        cold.reset(current)
+        self.assertEqual(cold.decide(current, worse, current), REJECT)
+        self.assertEqual(cold.decide(current, better, current), ACCEPT)
+
+    def test_great_deluge_accepts_worse_moves_below_the_level(self):
+        deluge = GreatDeluge(rain=0.5)
+        deluge.reset(Fitness(5, 0, 0, 0, 0))
+        current = best = Fitness(1, 0, 0, 0, 0)
+        # The level sinks halfway to the best energy every step: 300, then 200
+        self.assertEqual(deluge.decide(current, Fitness(3, 0, 0, 0, 0), best), ACCEPT)
+        self.assertEqual(deluge.decide(current, Fitness(3, 0, 0, 0, 0), best), REJECT)
+        self.assertEqual(deluge.decide(current, Fitness(1, 0, 0, 0, 0), best), ACCEPT)
+
+
+class PopulationAlgorithmTests(TestCase):
+    def setUp(self):
+        random.seed(4)
+        self.days_per_week, self.slots_per_day = 5, 6
+        self.rooms, self.faculties, self.groups, self.sections = build_problem(seed=4)
+
+    def test_crossovers_take_each_placement_from_a_parent(self):
+        parent = create(self.sections, self.rooms)
+        other = create(self.sections, self.rooms)
+        rng = np.random.default_rng(0)
+        section_groups = np.array([section.group.index for section in self.sections])
+
+        child = uniform_crossover(parent, other, rng)
+        for index in range(len(child)):
+            self.assertIn(child[index], (parent[index], other[index]))
+
+        child = group_crossover(parent, other, rng, section_groups, len(self.groups))
+        for group in self.groups:
+            indices = [index for index, section in enumerate(self.sections) if section.group is group]
+            self.assertTrue(
+                all(child[index] == parent[index] for index in indices)
+                or all(child[index] == other[index] for index in indices)
+            )
+
+    def create_algorithm(self, cache=None):
+        evaluator = BatchFitnessEvaluator(
+            self.sections, self.days_per_week, self.slots_per_day, self.faculties, len(self.rooms), len(self.groups)
+        )
+        algorithm = PopulationAlgorithm(
+            evaluator.evaluate, lambda: create(self.sections, self.rooms), mutate, lambda schedule: None,
+            population_size=10, elite_size=3, cache=cache
+        )
+        algorithm.section_groups = np.array([section.group.index for section in self.sections], dtype=np.int64)
+        algorithm.group_count = len(self.groups)
+        return algorithm
+
+    def test_duplicates_are_removed(self):
+        zobrist = ZobristTable(len(self.sections), self.days_per_week, self.slots_per_day, len(self.rooms))
+        for cache in (None, FitnessCache(zobrist)):
+            algorithm = self.create_algorithm(cache)
+            schedules = [create(self.sections, self.rooms) for _ in range(4)]
+            population = algorithm._unique(algorithm._evaluate(schedules + [slots.copy() for slots in schedules[:2]]))
+
+            self.assertEqual(len(population), 4)
+            self.assertEqual(len({tuple(placements(schedule.slots)) for schedule in population}), 4)
+            fitnesses = [schedule.fitness for schedule in population]
+            self.assertFalse(any(later > earlier for earlier, later in zip(fitnesses, fitnesses[1:])))
+
+    def test_elites_survive_each_generation(self):
+        algorithm = self.create_algorithm()
+        population = algorithm._unique(algorithm._evaluate([create(self.sections, self.rooms) for _ in range(10)]))
+        for _ in range(5):
+            elites = [tuple(placements(schedule.slots)) for schedule in population[:algorithm.elite_size]]
+            best = population[0].fitness
+            population = algorithm._next_generation(population, time.time(), 10)
+
+            survivors = {tuple(placements(schedule.slots)) for schedule in population}
+            self.assertTrue(all(elite in survivors for elite in elites))
+            self.assertFalse(best > population[0].fitness)
+
+    def test_time_limit_bounds_slow_creation(self):
+        evaluator = BatchFitnessEvaluator(
+            self.sections, self.days_per_week, self.slots_per_day, self.faculties, len(self.rooms), len(self.groups)
+        )
+
+        def create_slowly():
+            time.sleep(0.05)
+            return create(self.sections, self.rooms)
+
+        algorithm = PopulationAlgorithm(evaluator.evaluate, create_slowly, mutate, lambda schedule: None, population_size=50)
+        start = time.time()
+        algorithm.get_best(Fitness(0, 0, 0, 1, 1), 0.3)
+
+        self.assertLess(time.time() - start, 0.6)
+        self.assertEqual(algorithm.stop_reason, 'TIME_LIMIT')
+
+
+class IslandModelTests(TestCase):
+    def test_islands_continue_from_better_migrants(self):
+        random.seed(5)
+        rooms, faculties, groups, sections = build_problem(seed=5)
+        own, migrant = create(sections, rooms), create(sections, rooms)
+        starts = []
+
+        class RecordingSolver:
+            """Stands in for an island's solver, recording the schedule every epoch starts from"""
+            evaluations = 0
+
+            def __init__(self, fnCreate):
+                self.create = fnCreate
+
+            def get_best(self, optimal_fitness, time_limit):
+                slots = self.create()
+                starts.append(placements(slots))
+                return Schedule(slots, Fitness(5, 0, 0, 0, 0))
+
+        connection, island_connection = billiard.Pipe()
+        island = threading.Thread(target=_run_island, args=(
+            0, RecordingSolver, own.copy, Fitness(0, 0, 0, 1, 1), time.time() + 10, 0.1, island_connection
+        ))
+        island.start()
+        # A better migrant is taken up, a worse one is not
+        connection.recv()
+        connection.send((_encode(migrant), Fitness(0, 0, 0, 0, 0)))
+        connection.recv()
+        connection.send((_encode(migrant), Fitness(9, 0, 0, 0, 0)))
+        connection.recv()
+        connection.close()
+        island.join()
+
+        self.assertEqual(starts[:3], [placements(own), placements(migrant), placements(own)])
+
+    def create_model(self, fnCreate, faculties, groups, migration_interval):
+        return IslandModel(
+            lambda fnCreateIsland: GeneticAlgorithm(
+                lambda slots: FitnessEvaluator(slots, 5, 6, faculties, len(groups)),
+                fnCreateIsland,
+                mutate,
+                lambda schedule: None,
+                max_age=20
+            ),
+            fnCreate,
+            lambda schedule: None,
+            islands=2,
+            migration_interval=migration_interval
+        )
+
+    def test_slow_islands_still_return_a_schedule(self):
+        random.seed(6)
+        rooms, faculties, groups, sections = build_problem(seed=6)
+
+        def fnCreate():
+            time.sleep(0.05)    # Slower than the whole time limit
+            return create(sections, rooms)
+
+        model = self.create_model(fnCreate, faculties, groups, 0.001)
+        best = model.get_best(Fitness(0, 0, 0, 1, 1), 0.001)
+
+        self.assertIsNotNone(best)
+        self.assertEqual(str(best.fitness), str(get_fitness(best.slots, 5, faculties, len(groups))))
+        self.assertEqual(model.stop_reason, 'TIME_LIMIT')
+
+    def test_plateau_counts_the_evaluations_of_all_islands(self):
+        random.seed(7)
+        rooms, faculties, groups, sections = build_problem(seed=7, section_count=8)
+        model = self.create_model(lambda: create(sections, rooms), faculties, groups, 0.05)
+        model.configure_stopping(stagnation_evaluations=2000)
+        start_time = time.time()
+        best = model.get_best(Fitness(0, 0, 0, 2, 2), 10)
+
+        self.assertEqual(best.fitness.total_conflict, 0)
+        self.assertEqual(model.stop_reason, 'PLATEAU')
+        self.assertLess(time.time() - start_time, 10)
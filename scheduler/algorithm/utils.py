@@ -1,4 +1,5 @@
 import random
+from collections import defaultdict
 
 from django.db import transaction
 
@@ -10,7 +11,9 @@ from scheduler.faculty.models import Faculty as DB_Faculty
 
 from .course import Course
 from .date_time_slot import DateTimeSlot
+from .domain import Domain
 from .faculty import Faculty
+from .feasibility import seating_rooms
 from .group import Group
 from .room import Room
 from .section import Section
@@ -38,43 +41,76 @@ def get_date_time_slot(date_time_slot):
     return DateTimeSlot(date_time_slot.day, date_time_slot.time)
 
 
-def get_faculty_object(faculty):
+class Registry:
+    """Interns algorithm objects so that each entity exists once per run.
+
+    Interned rooms, faculties and groups get a dense index in load order,
+    which the solver uses instead of hashing ids.
+    """
+
+    def __init__(self):
+        self.rooms = {}
+        self.faculties = {}
+        self.courses = {}
+        self.groups = {}
+
+
+def get_faculty_object(faculty, registry=None):
     """Convert Faculty db object to Faculty object"""
     if not faculty:
         raise ValueError("Faculty cannot be None")
+    if registry is not None and faculty.faculty_id in registry.faculties:
+        return registry.faculties[faculty.faculty_id]
     slot_choices = [
         get_date_time_slot(date_time_slot) 
         for date_time_slot in faculty.slot_choices.all()
     ]
-    return Faculty(faculty.faculty_id, faculty.priority, slot_choices)
+    if registry is None:
+        return Faculty(faculty.faculty_id, faculty.priority, slot_choices)
+    faculty_object = Faculty(faculty.faculty_id, faculty.priority, slot_choices, len(registry.faculties))
+    registry.faculties[faculty.faculty_id] = faculty_object
+    return faculty_object
 
 
-def get_room_object(room):
+def get_room_object(room, registry=None):
     """Convert Room db object to Room object"""
     if not room:
         raise ValueError("Room cannot be None")
-    return Room(room.room_id, room.capacity)
+    if registry is None:
+        return Room(room.room_id, room.capacity)
+    if room.room_id not in registry.rooms:
+        registry.rooms[room.room_id] = Room(room.room_id, room.capacity, len(registry.rooms))
+    return registry.rooms[room.room_id]
 
 
-def get_course_object(course):
+def get_course_object(course, registry=None):
     """Convert Course db object to Course object"""
     if not course:
         raise ValueError("Course cannot be None")
+    if registry is not None and course.course_id in registry.courses:
+        return registry.courses[course.course_id]
     rooms = [
-        get_room_object(room)
+        get_room_object(room, registry)
         for room in course.rooms.all()
     ]
-    return Course(course.course_id, rooms)
+    if registry is None:
+        return Course(course.course_id, rooms)
+    registry.courses[course.course_id] = Course(course.course_id, rooms)
+    return registry.courses[course.course_id]
 
 
-def get_group_object(group):
+def get_group_object(group, registry=None):
     """Convert Group db object to Group object"""
     if not group:
         raise ValueError("Group cannot be None")
-    return Group(group.group_id, group.size)
+    if registry is None:
+        return Group(group.group_id, group.size)
+    if group.group_id not in registry.groups:
+        registry.groups[group.group_id] = Group(group.group_id, group.size, len(registry.groups))
+    return registry.groups[group.group_id]
 
 
-def get_rooms(org_id):
+def get_rooms(org_id, registry=None):
     """Fetch and convert Room db objects to Room object list"""
     try:
         rooms = DB_Room.objects.filter(
@@ -82,7 +118,7 @@ def get_rooms(org_id):
         )
 
         room_list = [
-            get_room_object(room)
+            get_room_object(room, registry)
             for room in rooms
         ]
         return room_list
@@ -90,7 +126,7 @@ def get_rooms(org_id):
         raise ValueError(f"No rooms in organization {org_id}")
 
 
-def get_faculties(org_id):
+def get_faculties(org_id, registry=None):
     """Fetch and convert Faculty db objects to Faculty object list"""
     try:
         faculties = DB_Faculty.objects.filter(
@@ -98,7 +134,7 @@ def get_faculties(org_id):
         )
 
         faculty_list = [
-            get_faculty_object(faculty)
+            get_faculty_object(faculty, registry)
             for faculty in faculties
         ]
         return faculty_list
@@ -108,7 +144,7 @@ def get_faculties(org_id):
 
 
 
-def get_group_count_and_sections(org_id, timetable_id):
+def get_group_count_and_sections(org_id, timetable_id, registry=None):
     """Fetch group count and convert Section db objects to Section object list"""
     try:
         timetable = TimeTable.objects.get(
@@ -117,15 +153,15 @@ def get_group_count_and_sections(org_id, timetable_id):
         )
         # Prefetch related objects for better performance
         sections = timetable.section_set.prefetch_related(
-            'faculty__slot_choices', 'course', 'group'
+            'faculty__slot_choices', 'course__rooms', 'group'
         ).all()
 
         section_list = [
             Section(
                 id=section.id,
-                faculty=get_faculty_object(section.faculty),
-                course=get_course_object(section.course),
-                group=get_group_object(section.group),
+                faculty=get_faculty_object(section.faculty, registry),
+                course=get_course_object(section.course, registry),
+                group=get_group_object(section.group, registry),
                 duration=section.duration
             )
             for section in sections
@@ -136,6 +172,57 @@ def get_group_count_and_sections(org_id, timetable_id):
         raise ValueError(f"TimeTable with id {timetable_id} for organization {org_id} not found")
 
 
+def build_faculty_preferences(faculty_list, sections, days_per_week, slots_per_day):
+    """Precompute each faculty's preference grid and maximum preference score"""
+    faculty_section_count = defaultdict(int)
+    for section in sections:
+        faculty_section_count[section.faculty.faculty_id] += section.duration
+
+    for faculty in faculty_list:
+        faculty.preferred = [bytearray(slots_per_day + 1) for _ in range(days_per_week + 1)]
+        for choice in faculty.slot_choices:
+            if 1 <= choice.day <= days_per_week and 1 <= choice.time <= slots_per_day:
+                faculty.preferred[choice.day][choice.time] = 1
+        max_good_slots = min(faculty_section_count[faculty.faculty_id], len(faculty.slot_choices))
+        faculty.max_score = max_good_slots * faculty.priority
+
+
+def build_section_domains(sections, room_list, days_per_week, slots_per_day):
+    """Precompute the valid starts and rooms of every section"""
+    for section in sections:
+        last_start = slots_per_day - section.duration + 1
+        if last_start < 1:
+            raise ValueError(f"Section {section} is longer than the {slots_per_day} slots of a day")
+        starts = [(day, time) for day in range(1, days_per_week + 1) for time in range(1, last_start + 1)]
+
+        preferred_starts = [
+            (choice.day, time)
+            for choice in section.faculty.slot_choices
+            if 1 <= choice.day <= days_per_week
+            for time in range(max(choice.time - section.duration + 1, 1), min(choice.time, last_start) + 1)
+        ]
+
+        # feasibility.analyse reports a section without such rooms before the search
+        rooms = [room.index for room in seating_rooms(section, room_list)]
+        if not rooms:
+            raise ValueError(f"No room seats the group of section {section}")
+
+        section.domain = Domain(starts, preferred_starts or starts, rooms)
+
+
+def get_related_sections(sections):
+    """Indices of the other sections sharing a faculty or group with every section"""
+    by_faculty = defaultdict(list)
+    by_group = defaultdict(list)
+    for index, section in enumerate(sections):
+        by_faculty[section.faculty.index].append(index)
+        by_group[section.group.index].append(index)
+    return [
+        sorted((set(by_faculty[section.faculty.index]) | set(by_group[section.group.index])) - {index})
+        for index, section in enumerate(sections)
+    ]
+
+
 def save_slots_to_db(slots, org_id):
     """Create or update Slot entries in the database.
 
@@ -143,16 +230,17 @@ def save_slots_to_db(slots, org_id):
     - Otherwise, create new slots for all.
 
     Args:
-        slots: List of Slot objects with section, room, and datetime attributes
+        slots: SlotArray with the day, time and room index of every section
         org_id: Organization ID
 
     Raises:
         ValueError: If any related object (Section, Room, DateTimeSlot) is not found
     """
     with transaction.atomic():
-        section_ids = [slot.section.id for slot in slots]
-        room_ids = [slot.room.room_id for slot in slots]
-        datetime_keys = {(slot.datetime.day, slot.datetime.time) for slot in slots}
+        section_ids = [section.id for section in slots.sections]
+        room_ids = [slots.room_list[room].room_id for room in slots.rooms]
+        datetime_keys = set(zip(slots.days, slots.times))
+        placements = list(zip(section_ids, room_ids, slots.days, slots.times))
 
         # Validate Sections
         sections = {s.id: s for s in DB_Section.objects.filter(id__in=section_ids)}
@@ -191,18 +279,18 @@ def save_slots_to_db(slots, org_id):
 
         if should_update:
             to_update = []
-            for slot in slots:
-                db_slot = existing_slot_map.get(slot.section.id)
+            for section_id, room_id, day, time in placements:
+                db_slot = existing_slot_map.get(section_id)
                 if db_slot:
-                    db_slot.room = rooms[slot.room.room_id]
-                    db_slot.date_time_slot = date_time_slots[(slot.datetime.day, slot.datetime.time)]
+                    db_slot.room = rooms[room_id]
+                    db_slot.date_time_slot = date_time_slots[(day, time)]
                     to_update.append(db_slot)
                 else:
                     # Slot missing for an existing section: create it
                     to_update.append(DB_Slot(
-                        section=sections[slot.section.id],
-                        room=rooms[slot.room.room_id],
-                        date_time_slot=date_time_slots[(slot.datetime.day, slot.datetime.time)]
+                        section=sections[section_id],
+                        room=rooms[room_id],
+                        date_time_slot=date_time_slots[(day, time)]
                     ))
             DB_Slot.objects.bulk_update(
                 [s for s in to_update if s.id], ['room', 'date_time_slot']
@@ -214,11 +302,11 @@ def save_slots_to_db(slots, org_id):
         else:
             to_create = [
                 DB_Slot(
-                    section=sections[slot.section.id],
-                    room=rooms[slot.room.room_id],
-                    date_time_slot=date_time_slots[(slot.datetime.day, slot.datetime.time)]
+                    section=sections[section_id],
+                    room=rooms[room_id],
+                    date_time_slot=date_time_slots[(day, time)]
                 )
-                for slot in slots
+                for section_id, room_id, day, time in placements
             ]
             DB_Slot.objects.bulk_create(to_create)
             return to_create
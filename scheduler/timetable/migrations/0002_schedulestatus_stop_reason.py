@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulestatus',
+            name='stop_reason',
+            field=models.CharField(blank=True, choices=[('OPTIMAL', 'Optimal schedule found'), ('PLATEAU', 'No further improvement'), ('TIME_LIMIT', 'Time limit reached'), ('COMPLETED', 'Search completed')], max_length=10, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0002_schedulestatus_stop_reason'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulestatus',
+            name='report',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='schedulestatus',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('FAILURE', 'Failure'), ('INFEASIBLE', 'Infeasible')], default='PENDING', max_length=10),
+        ),
+    ]
@@ -62,11 +62,20 @@ class ScheduleStatus(models.Model):
         ('RUNNING', 'Running'),
         ('SUCCESS', 'Success'),
         ('FAILURE', 'Failure'),
+        ('INFEASIBLE', 'Infeasible'),
+    ]
+    STOP_REASON_CHOICES = [
+        ('OPTIMAL', 'Optimal schedule found'),
+        ('PLATEAU', 'No further improvement'),
+        ('TIME_LIMIT', 'Time limit reached'),
+        ('COMPLETED', 'Search completed'),
     ]
 
     timetable = models.OneToOneField(TimeTable, on_delete=models.CASCADE)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     task_id = models.CharField(max_length=100, null=True, blank=True)
+    stop_reason = models.CharField(max_length=10, choices=STOP_REASON_CHOICES, null=True, blank=True)
+    report = models.TextField(null=True, blank=True)    # Why an infeasible timetable was not scheduled
     last_run_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
@@ -1,5 +1,12 @@
 from celery import shared_task
-from website.settings import ALGO_TIME_LIMIT
+from website.settings import (
+    ALGO_TIME_LIMIT, ALGO_CHILDREN, ALGO_CONFLICT_FOCUS, ALGO_ACCEPTANCE, ALGO_STRATEGY, ALGO_POPULATION_SIZE,
+    ALGO_ISLANDS, ALGO_MIGRATION_INTERVAL, ALGO_TABU_TENURE, ALGO_NEIGHBOURHOOD_SIZE, ALGO_EXACT_THRESHOLD,
+    ALGO_STAGNATION_TIME, ALGO_STAGNATION_EVALUATIONS, ALGO_RESTARTS, ALGO_RESTART_POLICY,
+    ALGO_CACHE_SIZE, ALGO_ROOM_MATCHING, ALGO_LNS_DESTROY_SIZE, ALGO_TWO_PHASE,
+    ALGO_POLISH_TIME, ALGO_POLISH_STRATEGY
+)
+from scheduler.algorithm.feasibility import InfeasibleError
 from scheduler.algorithm.scheduler import Scheduler
 from .models import TimeTable, ScheduleStatus
 
@@ -10,13 +17,45 @@ def run_scheduler_task(self, org_id, timetable_id, time_limit):
         status, _ = ScheduleStatus.objects.get_or_create(timetable=timetable)
         status.status = "RUNNING"
         status.task_id = self.request.id
+        status.stop_reason = None
+        status.report = None
         status.save()
 
         time_limit = min(time_limit, ALGO_TIME_LIMIT)
-        scheduler = Scheduler(org_id=org_id, timetable_id=timetable_id, time_limit=time_limit)
+        scheduler = Scheduler(
+            org_id=org_id,
+            timetable_id=timetable_id,
+            time_limit=time_limit,
+            children=ALGO_CHILDREN,
+            focus=ALGO_CONFLICT_FOCUS,
+            acceptance=ALGO_ACCEPTANCE,
+            strategy=ALGO_STRATEGY,
+            population_size=ALGO_POPULATION_SIZE,
+            islands=ALGO_ISLANDS,
+            migration_interval=ALGO_MIGRATION_INTERVAL,
+            tabu_tenure=ALGO_TABU_TENURE,
+            neighbourhood_size=ALGO_NEIGHBOURHOOD_SIZE,
+            exact_threshold=ALGO_EXACT_THRESHOLD,
+            stagnation_time=ALGO_STAGNATION_TIME or None,
+            stagnation_evaluations=ALGO_STAGNATION_EVALUATIONS or None,
+            restarts=ALGO_RESTARTS,
+            restart_policy=ALGO_RESTART_POLICY,
+            cache_size=ALGO_CACHE_SIZE,
+            room_matching=ALGO_ROOM_MATCHING,
+            destroy_size=ALGO_LNS_DESTROY_SIZE,
+            two_phase=ALGO_TWO_PHASE,
+            polish_time=ALGO_POLISH_TIME,
+            polish_strategy=ALGO_POLISH_STRATEGY
+        )
         scheduler.run()
 
         status.status = "SUCCESS"
+        status.stop_reason = scheduler.stop_reason
+        status.save()
+    except InfeasibleError as e:
+        # Not a task failure: the report tells the user what to change
+        status.status = "INFEASIBLE"
+        status.report = "\n".join(e.problems)
         status.save()
     except Exception as e:
         status.status = "FAILURE"
@@ -167,6 +167,8 @@ class TimeTableScheduleView(OrganizationContextMixin, FormView):
         status, _ = ScheduleStatus.objects.get_or_create(timetable=timetable)
         status.status = "PENDING"
         status.task_id = task.id
+        status.stop_reason = None
+        status.report = None
         status.save()
 
         return super().form_valid(form)
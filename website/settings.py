@@ -31,6 +31,56 @@ DEBUG = config('DJANGO_DEBUG', cast=bool)
 # Maximum time limit for a algorithm in seconds
 ALGO_TIME_LIMIT = config('ALGO_TIME_LIMIT', cast=int)
 
+# Children generated per step of the algorithm, of which the best is kept, and starting
+# schedules generated and scored together in one batch
+ALGO_CHILDREN = config('ALGO_CHILDREN', default=1, cast=int)
+
+# Probability of mutating a slot that is in a conflict or outside its faculty's preferences
+ALGO_CONFLICT_FOCUS = config('ALGO_CONFLICT_FOCUS', default=0.5, cast=float)
+
+# Rule for accepting worse schedules: 'age', 'annealing', 'late' (acceptance) or 'deluge'
+ALGO_ACCEPTANCE = config('ALGO_ACCEPTANCE', default='age')
+
+# Search strategy of the algorithm: 'genetic' (single lineage), 'population', 'island', 'tabu' or 'lns'
+# (large neighbourhood search)
+ALGO_STRATEGY = config('ALGO_STRATEGY', default='genetic')
+ALGO_POPULATION_SIZE = config('ALGO_POPULATION_SIZE', default=50, cast=int)
+
+# Worker processes of the island strategy and seconds between their migrations
+ALGO_ISLANDS = config('ALGO_ISLANDS', default=os.cpu_count() or 1, cast=int)
+ALGO_MIGRATION_INTERVAL = config('ALGO_MIGRATION_INTERVAL', default=5, cast=float)
+
+# Timetables with at most this many sections are first solved exactly (0 disables)
+ALGO_EXACT_THRESHOLD = config('ALGO_EXACT_THRESHOLD', default=12, cast=int)
+
+# Stop once a conflict-free search has not improved for this many seconds or evaluations (0 disables),
+# and the number of restarts, from a 'fresh' schedule or the 'best' one, when one with conflicts stalls
+ALGO_STAGNATION_TIME = config('ALGO_STAGNATION_TIME', default=0, cast=float)
+ALGO_STAGNATION_EVALUATIONS = config('ALGO_STAGNATION_EVALUATIONS', default=0, cast=int)
+ALGO_RESTARTS = config('ALGO_RESTARTS', default=0, cast=int)
+ALGO_RESTART_POLICY = config('ALGO_RESTART_POLICY', default='fresh')
+
+# Steps a tabu search move stays forbidden and moves sampled per step
+ALGO_TABU_TENURE = config('ALGO_TABU_TENURE', default=10, cast=int)
+ALGO_NEIGHBOURHOOD_SIZE = config('ALGO_NEIGHBOURHOOD_SIZE', default=50, cast=int)
+
+# Most sections the large neighbourhood search lifts and places again per step
+ALGO_LNS_DESTROY_SIZE = config('ALGO_LNS_DESTROY_SIZE', default=8, cast=int)
+
+# Schedules whose fitness is remembered to skip re-evaluating them (0 disables)
+ALGO_CACHE_SIZE = config('ALGO_CACHE_SIZE', default=100000, cast=int)
+
+# Search day and time only and assign the rooms by bipartite matching
+ALGO_ROOM_MATCHING = config('ALGO_ROOM_MATCHING', default=False, cast=bool)
+
+# Count conflicts alone until a schedule has none, then score the soft constraints too
+ALGO_TWO_PHASE = config('ALGO_TWO_PHASE', default=False, cast=bool)
+
+# Seconds of steepest descent after the search, on top of ALGO_TIME_LIMIT (0 disables), applying
+# each improving move as it is found ('first') or the most improving one ('best')
+ALGO_POLISH_TIME = config('ALGO_POLISH_TIME', default=0, cast=float)
+ALGO_POLISH_STRATEGY = config('ALGO_POLISH_STRATEGY', default='first')
+
 
 ALLOWED_HOSTS = config('DJANGO_ALLOWED_HOSTS', default='*').split(',')
 